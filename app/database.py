@@ -1,17 +1,24 @@
 """
 NetKeeper - Conexión async a PostgreSQL
 """
+import logging
+from contextlib import AsyncExitStack
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.orm import DeclarativeBase, raiseload
 from app.config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger("database")
 
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=settings.DATABASE_ECHO,
-    pool_size=20,
-    max_overflow=10,
+    pool_size=settings.DATABASE_POOL_SIZE,
+    max_overflow=settings.DATABASE_MAX_OVERFLOW,
+    pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+    pool_recycle=settings.DATABASE_POOL_RECYCLE,
     pool_pre_ping=True,
 )
 
@@ -26,6 +33,130 @@ class Base(DeclarativeBase):
     pass
 
 
+async def warm_pool(size: int) -> None:
+    """
+    Abre `size` conexiones a la vez y las devuelve al pool,
+    para que la primera ráfaga de requests no pague el connect.
+    """
+    async with AsyncExitStack() as stack:
+        for _ in range(min(size, settings.DATABASE_POOL_SIZE)):
+            conn = await stack.enter_async_context(engine.connect())
+            await conn.execute(text("SELECT 1"))
+
+
+# create_all no toca tablas que ya existen: los índices/constraints que se
+# agregan a modelos existentes van acá. Cada paso revisa si ya se aplicó.
+_DEDUPE_WHATSAPP_CONVERSATIONS = [
+    # 1. Los mensajes de conversaciones repetidas pasan a la más antigua
+    """
+    UPDATE whatsapp_messages m SET conversation_id = d.keep_id
+    FROM (
+        SELECT id, min(id) OVER (PARTITION BY tenant_id, phone_number) AS keep_id
+        FROM whatsapp_conversations
+    ) d
+    WHERE m.conversation_id = d.id AND d.id <> d.keep_id
+    """,
+    # 2. La conversación que queda suma no leídos y toma el último mensaje
+    """
+    UPDATE whatsapp_conversations k SET
+        unread_count = g.unread_count,
+        last_message_at = g.last_message_at,
+        last_message_preview = g.last_message_preview,
+        contact_name = COALESCE(k.contact_name, g.contact_name)
+    FROM (
+        SELECT DISTINCT ON (tenant_id, phone_number)
+            min(id) OVER w AS keep_id,
+            sum(COALESCE(unread_count, 0)) OVER w AS unread_count,
+            last_message_at,
+            last_message_preview,
+            max(contact_name) OVER w AS contact_name,
+            count(*) OVER w AS n
+        FROM whatsapp_conversations
+        WINDOW w AS (PARTITION BY tenant_id, phone_number)
+        ORDER BY tenant_id, phone_number, last_message_at DESC NULLS LAST, id DESC
+    ) g
+    WHERE k.id = g.keep_id AND g.n > 1
+    """,
+    # 3. Borrar las repetidas (ya sin mensajes)
+    """
+    DELETE FROM whatsapp_conversations c
+    USING whatsapp_conversations k
+    WHERE k.tenant_id = c.tenant_id AND k.phone_number = c.phone_number AND k.id < c.id
+    """,
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS uq_whatsapp_conv_tenant_phone
+    ON whatsapp_conversations (tenant_id, phone_number)
+    """,
+]
+
+# invoices.amount_paid pasa a NOT NULL DEFAULT 0 (el código suma sin COALESCE)
+_INVOICES_AMOUNT_PAID_NOT_NULL = [
+    "UPDATE invoices SET amount_paid = 0 WHERE amount_paid IS NULL",
+    "ALTER TABLE invoices ALTER COLUMN amount_paid SET DEFAULT 0, "
+    "ALTER COLUMN amount_paid SET NOT NULL",
+]
+
+
+def _create_missing_indexes(sync_conn) -> None:
+    """
+    create_all arma los índices sólo junto con su tabla: los que se declaran
+    después en un modelo existente (Index(...) al pie de cada models/*.py)
+    se crean acá si faltan. Uno que no se puede crear (p. ej. un UNIQUE
+    con filas repetidas) queda en el log y no frena el arranque.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                with sync_conn.begin_nested():
+                    index.create(sync_conn, checkfirst=True)
+            except DBAPIError as e:
+                logger.error(f"No se pudo crear el índice {index.name}: {e.orig}")
+
+
+async def apply_schema_upgrades(conn) -> None:
+    """
+    Ajustes idempotentes sobre tablas existentes; corre en el arranque,
+    después de create_all y en la misma transacción.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    # ON CONFLICT (tenant_id, phone_number) del webhook de WhatsApp
+    if await conn.scalar(text("SELECT to_regclass('uq_whatsapp_conv_tenant_phone')")) is None:
+        for stmt in _DEDUPE_WHATSAPP_CONVERSATIONS:
+            await conn.execute(text(stmt))
+    # Facturas creadas antes del NOT NULL pueden tener amount_paid en NULL
+    amount_paid_nullable = await conn.scalar(text(
+        "SELECT is_nullable FROM information_schema.columns "
+        "WHERE table_schema = current_schema() "
+        "AND table_name = 'invoices' AND column_name = 'amount_paid'"
+    ))
+    if amount_paid_nullable == "YES":
+        for stmt in _INVOICES_AMOUNT_PAID_NOT_NULL:
+            await conn.execute(text(stmt))
+    # Índices declarados después de crear las tablas (facturas, tickets, ...)
+    await conn.run_sync(_create_missing_indexes)
+
+
+def strict_loading() -> list:
+    """
+    Opciones extra para los .options(...) de lecturas con relaciones.
+    En DEBUG agrega raiseload("*"): cualquier relación que no se cargó
+    explícitamente lanza error en vez de hacer un lazy load oculto (N+1).
+    """
+    return [raiseload("*")] if settings.DEBUG else []
+
+
+async def relaxed_commit(session: AsyncSession) -> None:
+    """
+    Para escrituras de bajo riesgo (marcar leído, estados de entrega, ...):
+    el COMMIT de esta transacción no espera el fsync del WAL.
+    Ante una caída de PG se puede perder el último instante de estos
+    cambios, nunca corromperse. No usar en pagos ni facturación.
+    """
+    if session.bind.dialect.name == "postgresql":
+        await session.execute(text("SET LOCAL synchronous_commit = OFF"))
+
+
 async def get_db() -> AsyncSession:
     """Dependency que provee una sesión de BD por request."""
     async with AsyncSessionLocal() as session:
@@ -22,7 +22,13 @@ async def get_current_user(
     """
     Extrae y valida el JWT del header Authorization.
     Verifica que el user pertenezca al tenant del request.
+    El usuario resuelto se guarda en request.state para no repetir
+    la decodificación y la consulta dentro del mismo request.
     """
+    cached_user = getattr(request.state, "user", None)
+    if cached_user is not None:
+        return cached_user
+
     payload = decode_token(credentials.credentials)
     if not payload or payload.get("type") != "access":
         raise HTTPException(
@@ -53,6 +59,7 @@ async def get_current_user(
             detail="Usuario no encontrado o inactivo.",
         )
 
+    request.state.user = user
     return user
 
 
@@ -3,10 +3,11 @@ Sistema ISP - Punto de entrada FastAPI
 Plataforma SaaS Multi-Tenant para ISPs
 """
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.config import get_settings
-from app.database import engine, Base
+from app.database import engine, Base, warm_pool, apply_schema_upgrades
 from app.middleware.tenant_resolver import TenantResolverMiddleware
 
 # Routers
@@ -26,6 +27,10 @@ from app.routers.client_files import router as client_files_router
 from app.routers.tickets import router as tickets_router
 from app.routers.whatsapp import router as whatsapp_router
 from app.routers.whatsapp import webhook_router as whatsapp_webhook_router
+from app.routers.whatsapp import GUPSHUP_HTTP as gupshup_http
+from app.routers.whatsapp import start_webhook_workers, stop_webhook_workers
+from app.services.tapipay_service import TAPIPAY_HTTP as tapipay_http
+from app.services.mikrotik_service import close_mikrotik_pool, stop_mikrotik_writers
 from app.routers.payment_gateways import router as payment_gateways_router
 from app.routers.payment_gateways import webhook_router as payment_webhook_router
 from app.routers.mikrotik_import import router as mikrotik_import_router
@@ -43,8 +48,16 @@ async def lifespan(app: FastAPI):
     """Crea las tablas al iniciar (en desarrollo). En prod usar Alembic."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await apply_schema_upgrades(conn)
+    await warm_pool(settings.DATABASE_POOL_WARMUP)
+    start_webhook_workers()
     print(f"🚀 {settings.APP_NAME} v{settings.APP_VERSION} iniciado")
     yield
+    await stop_webhook_workers()
+    await gupshup_http.aclose()
+    await tapipay_http.aclose()
+    await stop_mikrotik_writers()
+    close_mikrotik_pool()
     await engine.dispose()
     print(f"👋 {settings.APP_NAME} detenido")
 
@@ -54,6 +67,7 @@ app = FastAPI(
     version=settings.APP_VERSION,
     description="Plataforma SaaS para ISPs - Multi-Tenant",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS
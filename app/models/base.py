@@ -13,6 +13,10 @@ class TimestampMixin:
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
+    # Trae created_at/updated_at en el mismo INSERT/UPDATE ... RETURNING,
+    # así los endpoints no necesitan db.refresh() después del commit
+    __mapper_args__ = {"eager_defaults": True}
+
 
 class TenantBase(Base, TimestampMixin):
     """
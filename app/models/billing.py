@@ -11,7 +11,7 @@ Recargo:
 import enum
 from sqlalchemy import (
     Column, Integer, String, Boolean, Text, Float,
-    ForeignKey, Date, DateTime, Enum, JSON
+    ForeignKey, Date, DateTime, Enum, JSON, Index, text
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -132,7 +132,7 @@ class Invoice(TenantBase):
 
     # Montos
     amount = Column(Float, nullable=False)
-    amount_paid = Column(Float, default=0.0)
+    amount_paid = Column(Float, default=0.0, server_default=text("0"), nullable=False)
     currency = Column(String(5), default="MXN")
 
     # Estado
@@ -161,13 +161,30 @@ class Invoice(TenantBase):
 
     @property
     def balance(self):
-        return max(0, self.amount - (self.amount_paid or 0))
+        return max(0, self.amount - self.amount_paid)
 
     @property
     def is_fully_paid(self):
         return self.amount_paid >= self.amount
 
 
+# Facturas ya emitidas del periodo (antiduplicado en la facturación masiva
+# y en los recargos): búsqueda por cliente/periodo/tipo sobre activas
+Index(
+    "ix_invoices_dedup",
+    Invoice.tenant_id, Invoice.client_id, Invoice.period_year,
+    Invoice.period_month, Invoice.invoice_type, Invoice.connection_id,
+    postgresql_where=Invoice.is_active == True,
+)
+# Barridos diarios (recargos y suspensiones): facturas por estado con
+# fecha de corte vencida
+Index(
+    "ix_invoices_overdue_sweep",
+    Invoice.tenant_id, Invoice.status, Invoice.due_date,
+    postgresql_where=Invoice.is_active == True,
+)
+
+
 # ================================================================
 # PAGO (PAYMENT)
 # ================================================================
@@ -199,4 +216,12 @@ class Payment(TenantBase):
 
     # Relationships
     invoice = relationship("Invoice", back_populates="payments")
-    client = relationship("Client", backref="payments")
\ No newline at end of file
+    client = relationship("Client", backref="payments")
+
+# Un pago por operationId de tapipay: dos entregas del mismo webhook
+# procesadas a la vez no pueden registrar (ni abonar) el pago dos veces
+Index(
+    "uq_payments_tapipay_operation_id",
+    Payment.tapipay_operation_id, unique=True,
+    postgresql_where=Payment.tapipay_operation_id.isnot(None),
+)
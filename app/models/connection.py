@@ -6,7 +6,7 @@ Conexiones de internet. Dos tipos según célula:
 """
 from sqlalchemy import (
     Column, Integer, String, Boolean, Enum, Text, Numeric,
-    Date, ForeignKey
+    Date, ForeignKey, Index
 )
 from sqlalchemy.orm import relationship
 from app.models.base import TenantBase
@@ -124,3 +124,12 @@ class Connection(TenantBase):
 
     def __repr__(self):
         return f"<Connection {self.id} {self.connection_type.value} ({self.status.value})>"
+
+
+# Listado de conexiones activas del tenant por id DESC (paginación keyset
+# con after_id): el LIMIT se resuelve recorriendo el índice, sin OFFSET
+Index(
+    "ix_connections_tenant_id_active",
+    Connection.tenant_id, Connection.id.desc(),
+    postgresql_where=Connection.is_active == True,
+)
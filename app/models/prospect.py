@@ -3,7 +3,7 @@ Sistema ISP - Modelo Prospect
 Pre-clientes que aún no contratan. Seguimiento hasta conversión.
 """
 from sqlalchemy import (
-    Column, Integer, String, Boolean, Enum, Text, ForeignKey
+    Column, Integer, String, Boolean, Enum, Text, ForeignKey, Index
 )
 from sqlalchemy.orm import relationship
 from app.models.base import TenantBase
@@ -55,7 +55,8 @@ class Prospect(TenantBase):
     tenant = relationship("Tenant", back_populates="prospects")
     converted_client = relationship("Client", foreign_keys=[converted_client_id])
     registered_by = relationship("User", foreign_keys=[registered_by_id])
-    follow_ups = relationship("ProspectFollowUp", back_populates="prospect", cascade="all, delete-orphan")
+    follow_ups = relationship("ProspectFollowUp", back_populates="prospect", cascade="all, delete-orphan",
+                              order_by="ProspectFollowUp.created_at.desc()")
 
     @property
     def full_name(self):
@@ -65,6 +66,10 @@ class Prospect(TenantBase):
         return f"<Prospect {self.full_name} ({self.status.value})>"
 
 
+# Listado de prospectos: tenant + estado opcional, orden id DESC
+Index("ix_prospects_tenant_status_id", Prospect.tenant_id, Prospect.status, Prospect.id.desc())
+
+
 class ProspectFollowUp(TenantBase):
     __tablename__ = "prospect_follow_ups"
 
@@ -79,3 +84,10 @@ class ProspectFollowUp(TenantBase):
 
     def __repr__(self):
         return f"<FollowUp prospect={self.prospect_id}>"
+
+
+# Seguimientos de un prospecto, más recientes primero (cubre el FK prospect_id)
+Index(
+    "ix_prospect_follow_ups_prospect_created",
+    ProspectFollowUp.prospect_id, ProspectFollowUp.created_at.desc(),
+)
@@ -6,7 +6,7 @@ Con asignación a técnicos y seguimiento con notas.
 import enum
 from sqlalchemy import (
     Column, Integer, String, Boolean, Text, DateTime, Date,
-    ForeignKey, Enum, func
+    ForeignKey, Enum, Index, func
 )
 from sqlalchemy.orm import relationship
 from app.models.base import TenantBase
@@ -75,15 +75,42 @@ class Ticket(TenantBase):
     notes = relationship("TicketNote", back_populates="ticket", cascade="all, delete-orphan",
                          order_by="TicketNote.created_at.asc()")
 
+    # --- Nombres para respuestas (requieren la relación ya cargada) ---
+    @property
+    def assignee_name(self):
+        return self.assignee.username if self.assignee else None
+
+    @property
+    def creator_name(self):
+        return self.creator.username if self.creator else None
+
+    @property
+    def client_name(self):
+        return self.client.full_name if self.client else None
+
     def __repr__(self):
         return f"<Ticket #{self.id} {self.ticket_type.value} ({self.status.value})>"
 
 
+# Listado de tickets: filtro por tenant + activos, orden (created_at, id) DESC.
+# Parcial sobre is_active para que el keyset haga seek y corte en LIMIT.
+# INCLUDE lleva las columnas del listado: alcanza con un index-only scan.
+Index(
+    "ix_tickets_tenant_created_active",
+    Ticket.tenant_id, Ticket.created_at.desc(), Ticket.id.desc(),
+    postgresql_where=Ticket.is_active == True,
+    postgresql_include=[
+        "ticket_type", "status", "priority", "subject",
+        "assigned_to", "client_id", "scheduled_date",
+    ],
+)
+
+
 class TicketNote(TenantBase):
     __tablename__ = "ticket_notes"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ticket_id = Column(Integer, ForeignKey("tickets.id", ondelete="CASCADE"), nullable=False, index=True)
+    ticket_id = Column(Integer, ForeignKey("tickets.id", ondelete="CASCADE"), nullable=False)
 
     # --- Contenido ---
     note = Column(Text, nullable=False)                     # "Se revisó ONU, señal ok"
@@ -93,5 +120,13 @@ class TicketNote(TenantBase):
     ticket = relationship("Ticket", back_populates="notes")
     author = relationship("User", backref="ticket_notes")
 
+    @property
+    def author_name(self):
+        return self.author.username if self.author else None
+
     def __repr__(self):
-        return f"<TicketNote #{self.id} ticket={self.ticket_id}>"
\ No newline at end of file
+        return f"<TicketNote #{self.id} ticket={self.ticket_id}>"
+
+
+# Notas de un ticket en orden cronológico (también cubre el FK ticket_id)
+Index("ix_ticket_notes_ticket_created", TicketNote.ticket_id, TicketNote.created_at)
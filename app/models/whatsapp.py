@@ -6,7 +6,7 @@ Chat en vivo desde la plataforma con clientes por WhatsApp.
 import enum
 from sqlalchemy import (
     Column, Integer, String, Boolean, Text, DateTime,
-    ForeignKey, Enum, func
+    ForeignKey, Enum, Index, func
 )
 from sqlalchemy.orm import relationship
 from app.models.base import TenantBase
@@ -76,6 +76,10 @@ class WhatsappConfig(TenantBase):
 
 class WhatsappConversation(TenantBase):
     __tablename__ = "whatsapp_conversations"
+    __table_args__ = (
+        # Una conversación por número y tenant (destino del ON CONFLICT del webhook)
+        Index("uq_whatsapp_conv_tenant_phone", "tenant_id", "phone_number", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
 
@@ -102,10 +106,28 @@ class WhatsappConversation(TenantBase):
         order_by="WhatsappMessage.created_at.asc()"
     )
 
+    # --- Nombre para respuestas (requiere la relación ya cargada) ---
+    @property
+    def client_name(self):
+        return self.client.full_name if self.client else None
+
     def __repr__(self):
         return f"<Conversation {self.phone_number} ({self.status.value})>"
 
 
+# Bandeja: tenant + orden por último mensaje DESC, sin Sort en el plan.
+# La parcial cubre el filtro unread_only con el mismo orden.
+Index(
+    "ix_whatsapp_conv_tenant_lastmsg",
+    WhatsappConversation.tenant_id, WhatsappConversation.last_message_at.desc(),
+)
+Index(
+    "ix_whatsapp_conv_tenant_unread",
+    WhatsappConversation.tenant_id, WhatsappConversation.last_message_at.desc(),
+    postgresql_where=WhatsappConversation.unread_count > 0,
+)
+
+
 # ================================================================
 # MENSAJES
 # ================================================================
@@ -117,8 +139,7 @@ class WhatsappMessage(TenantBase):
     conversation_id = Column(
         Integer,
         ForeignKey("whatsapp_conversations.id", ondelete="CASCADE"),
-        nullable=False,
-        index=True
+        nullable=False
     )
 
     # --- Mensaje ---
@@ -129,7 +150,7 @@ class WhatsappMessage(TenantBase):
     media_filename = Column(String(255), nullable=True)        # Nombre del archivo
 
     # --- Gupshup ---
-    gupshup_message_id = Column(String(200), nullable=True)    # ID del mensaje en Gupshup
+    gupshup_message_id = Column(String(200), nullable=True, index=True)  # ID del mensaje en Gupshup
     status = Column(Enum(MessageStatus), default=MessageStatus.SENT, nullable=False)
 
     # --- Quién envió (si es outbound) ---
@@ -140,4 +161,9 @@ class WhatsappMessage(TenantBase):
     sender = relationship("User", backref="whatsapp_messages")
 
     def __repr__(self):
-        return f"<Message {self.direction.value} ({self.message_type.value})>"
\ No newline at end of file
+        return f"<Message {self.direction.value} ({self.message_type.value})>"
+
+
+# Historial de una conversación: últimos N mensajes por id DESC
+# (también cubre el FK conversation_id)
+Index("ix_whatsapp_messages_conv_id", WhatsappMessage.conversation_id, WhatsappMessage.id.desc())
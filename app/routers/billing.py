@@ -28,7 +28,7 @@ from app.schemas.billing import (
 from app.services.billing_service import (
     generate_invoices_for_group, get_client_billing_info,
     suspend_overdue_clients, generate_tapipay_identifier,
-    get_tapipay_service, generate_late_fees
+    get_tapipay_service, invalidate_tapipay_service, generate_late_fees
 )
 from app.services.tapipay_service import TapipayError
 
@@ -180,6 +180,7 @@ async def create_tapipay_config(
     config = TapipayConfig(tenant_id=user.tenant_id, **data.model_dump())
     db.add(config)
     await db.commit()
+    invalidate_tapipay_service(user.tenant_id)
     await db.refresh(config)
     return {"message": "Configuración tapipay creada", "id": config.id}
 
@@ -213,6 +214,7 @@ async def update_tapipay_config(
     for k, v in data.model_dump(exclude_unset=True).items():
         setattr(config, k, v)
     await db.commit()
+    invalidate_tapipay_service(user.tenant_id)
     return {"message": "Configuración actualizada"}
 
 
@@ -425,7 +427,7 @@ async def register_manual_payment(
     )
     db.add(payment)
 
-    invoice.amount_paid = (invoice.amount_paid or 0) + data.amount
+    invoice.amount_paid += data.amount
     if invoice.amount_paid >= invoice.amount:
         invoice.status = InvoiceStatus.PAID
     else:
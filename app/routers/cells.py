@@ -3,6 +3,7 @@ Sistema ISP - Router: Células
 CRUD + config OLT + zonas/NAPs/puertos + cascada para conexiones.
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from typing import List, Optional
@@ -13,6 +14,7 @@ from app.models.olt import OltConfig
 from app.models.network import OltZone, Nap, NapPort
 from app.models.plan import CellPlan, ServicePlan, CellInterface
 from app.models.user import User
+from app.schemas.common import trusted_response
 from app.schemas.cell import (
     CellCreate, CellUpdate, CellResponse, CellListResponse,
     OltConfigCreate, OltConfigResponse
@@ -216,18 +218,27 @@ async def get_nap_detail(
     if not nap or nap.tenant_id != user.tenant_id:
         raise HTTPException(404, "NAP no encontrada")
 
+    # Solo las columnas de NapPortResponse; ocupados y total salen como
+    # conteos de ventana en la misma consulta (se repiten en cada fila)
     ports_result = await db.execute(
-        select(NapPort).where(NapPort.nap_id == nap_id).order_by(NapPort.port_number)
+        select(
+            NapPort.id, NapPort.port_number, NapPort.is_occupied, NapPort.connection_id,
+            func.count().filter(NapPort.is_occupied == True).over().label("occupied"),
+            func.count().over().label("total"),
+        )
+        .where(NapPort.nap_id == nap_id)
+        .order_by(NapPort.port_number)
     )
-    ports = ports_result.scalars().all()
-    occupied = sum(1 for p in ports if p.is_occupied)
+    ports = ports_result.all()
+    occupied = ports[0].occupied if ports else 0
+    total = ports[0].total if ports else 0
 
-    return NapDetailResponse(
-        **{k: v for k, v in nap.__dict__.items() if not k.startswith("_")},
-        ports=[NapPortResponse.model_validate(p) for p in ports],
+    return trusted_response(NapDetailResponse.from_orm_fast(
+        nap,
+        ports=[NapPortResponse.from_orm_fast(p) for p in ports],
         occupied_count=occupied,
-        free_count=len(ports) - occupied
-    )
+        free_count=total - occupied
+    ))
 
 
 # ========== CASCADA (para dropdowns de conexión FIBRA) ==========
@@ -239,23 +250,23 @@ async def cascade_zones(
     user: User = Depends(get_current_user)
 ):
     """Paso 1 cascada: Zonas OLT de una célula."""
+    # Conteo de NAPs en la misma consulta (subconsulta correlacionada)
+    nap_count = (
+        select(func.count(Nap.id))
+        .where(Nap.olt_zone_id == OltZone.id)
+        .correlate(OltZone)
+        .scalar_subquery()
+    )
     result = await db.execute(
-        select(OltZone).where(
+        select(OltZone.id, OltZone.name, OltZone.slot_port, nap_count.label("nap_count"))
+        .where(
             OltZone.cell_id == cell_id,
             OltZone.tenant_id == user.tenant_id,
             OltZone.is_active == True
         ).order_by(OltZone.name)
     )
-    zones = result.scalars().all()
-    responses = []
-    for z in zones:
-        nap_count = await db.scalar(
-            select(func.count(Nap.id)).where(Nap.olt_zone_id == z.id)
-        )
-        responses.append(CascadeZoneResponse(
-            id=z.id, name=z.name, slot_port=z.slot_port, nap_count=nap_count or 0
-        ))
-    return responses
+    # Filas planas de la BD: orjson las codifica directo, sin pasar por Pydantic
+    return ORJSONResponse([dict(row) for row in result.mappings()])
 
 
 @router.get("/zones/{zone_id}/cascade/naps", response_model=List[CascadeNapResponse])
@@ -265,25 +276,21 @@ async def cascade_naps(
     user: User = Depends(get_current_user)
 ):
     """Paso 2 cascada: NAPs de una zona con puertos libres."""
+    free_ports = (
+        select(func.count(NapPort.id))
+        .where(NapPort.nap_id == Nap.id, NapPort.is_occupied == False)
+        .correlate(Nap)
+        .scalar_subquery()
+    )
     result = await db.execute(
-        select(Nap).where(
+        select(Nap.id, Nap.name, Nap.total_ports, free_ports.label("free_ports"))
+        .where(
             Nap.olt_zone_id == zone_id,
             Nap.tenant_id == user.tenant_id,
             Nap.is_active == True
         ).order_by(Nap.name)
     )
-    naps = result.scalars().all()
-    responses = []
-    for n in naps:
-        free = await db.scalar(
-            select(func.count(NapPort.id)).where(
-                NapPort.nap_id == n.id, NapPort.is_occupied == False
-            )
-        )
-        responses.append(CascadeNapResponse(
-            id=n.id, name=n.name, total_ports=n.total_ports, free_ports=free or 0
-        ))
-    return responses
+    return ORJSONResponse([dict(row) for row in result.mappings()])
 
 
 @router.get("/naps/{nap_id}/cascade/ports", response_model=List[CascadeFreePortResponse])
@@ -294,12 +301,12 @@ async def cascade_free_ports(
 ):
     """Paso 3 cascada: Solo puertos LIBRES de una NAP."""
     result = await db.execute(
-        select(NapPort).where(
+        select(NapPort.id, NapPort.port_number).where(
             NapPort.nap_id == nap_id,
             NapPort.is_occupied == False
         ).order_by(NapPort.port_number)
     )
-    return result.scalars().all()
+    return ORJSONResponse([dict(row) for row in result.mappings()])
 
 
 # ========== IP POOL ==========
@@ -312,6 +319,7 @@ async def get_ip_pool(
 ):
     from app.models.connection import Connection
     import ipaddress
+    import socket
 
     cell = await db.get(Cell, cell_id)
     if not cell or cell.tenant_id != user.tenant_id:
@@ -334,8 +342,10 @@ async def get_ip_pool(
             host_max = cell.ipv4_host_max or str(network.broadcast_address - 1)
             min_int = int(ipaddress.IPv4Address(host_min))
             max_int = int(ipaddress.IPv4Address(host_max))
+            # El rango se recorre como enteros y cada IP se formatea con
+            # inet_ntoa (C), sin crear un IPv4Address por host
             for ip_int in range(min_int, max_int + 1):
-                ip_str = str(ipaddress.IPv4Address(ip_int))
+                ip_str = socket.inet_ntoa(ip_int.to_bytes(4, "big"))
                 available.append({
                     "ip": ip_str,
                     "available": ip_str not in used_ips
@@ -343,13 +353,14 @@ async def get_ip_pool(
         except Exception:
             pass
 
+    free = sum(1 for ip in available if ip["available"])
     return {
         "range": f"{cell.ipv4_range}{cell.ipv4_mask}" if cell.ipv4_range else None,
         "used": list(used_ips.keys()),
         "pool": available,
         "total": len(available),
-        "free": sum(1 for ip in available if ip["available"]),
-        "occupied": sum(1 for ip in available if not ip["available"]),
+        "free": free,
+        "occupied": len(available) - free,
     }
 
 # ========== INTERFACES (ANTENAS) ==========
@@ -9,11 +9,12 @@ INTEGRACIÓN MIKROTIK:
 - Al cancelar → elimina configuración del MikroTik
 - Al cambiar status → suspende/reactiva en MikroTik
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, or_
 from typing import List, Optional
 import logging
+import orjson
 
 from app.dependencies import get_db, get_current_user
 from app.models.connection import Connection, ConnectionType, ConnectionStatus
@@ -99,50 +100,78 @@ async def list_connections(
     status: Optional[ConnectionStatus] = None,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
+    after_id: Optional[int] = None,
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user)
 ):
+    """
+    Listar conexiones (más recientes primero).
+    Paginación keyset: para la siguiente página enviar after_id con el id
+    de la última conexión recibida (se ignora page). Si llegan menos de
+    per_page conexiones no hay más páginas. page sigue funcionando igual.
+    """
+    # Join diferido: primero solo los ids de la página (filtro + orden +
+    # LIMIT/OFFSET sobre el índice de connections), después el join con
+    # clientes/planes/células únicamente para esas per_page filas
+    ids = select(Connection.id).where(
+        Connection.tenant_id == user.tenant_id, Connection.is_active == True
+    )
+
+    if cell_id:
+        ids = ids.where(Connection.cell_id == cell_id)
+    if client_id:
+        ids = ids.where(Connection.client_id == client_id)
+    if connection_type:
+        ids = ids.where(Connection.connection_type == connection_type)
+    if status:
+        ids = ids.where(Connection.status == status)
+
+    ids = ids.order_by(Connection.id.desc()).limit(per_page)
+    if after_id:
+        ids = ids.where(Connection.id < after_id)
+    else:
+        ids = ids.offset((page - 1) * per_page)
+    ids = ids.subquery()
+
     q = (
         select(
-            Connection,
+            Connection.id,
+            Connection.client_id,
+            Connection.connection_type,
+            Connection.status,
+            Connection.ip_address,
+            Connection.created_at,
             Client.first_name,
             Client.last_name,
             ServicePlan.name.label("plan_name"),
             Cell.name.label("cell_name")
         )
+        .join(ids, ids.c.id == Connection.id)
         .join(Client, Connection.client_id == Client.id, isouter=True)
         .join(ServicePlan, Connection.plan_id == ServicePlan.id, isouter=True)
         .join(Cell, Connection.cell_id == Cell.id, isouter=True)
-        .where(Connection.tenant_id == user.tenant_id, Connection.is_active == True)
+        .order_by(Connection.id.desc())
     )
-
-    if cell_id:
-        q = q.where(Connection.cell_id == cell_id)
-    if client_id:
-        q = q.where(Connection.client_id == client_id)
-    if connection_type:
-        q = q.where(Connection.connection_type == connection_type)
-    if status:
-        q = q.where(Connection.status == status)
-
-    q = q.order_by(Connection.id.desc()).offset((page - 1) * per_page).limit(per_page)
     result = await db.execute(q)
-    rows = result.all()
-
-    return [
-        ConnectionListResponse(
-            id=conn.id,
-            client_id=conn.client_id,
-            client_name=f"{fname or ''} {lname or ''}".strip(),
-            connection_type=conn.connection_type,
-            status=conn.status,
-            ip_address=conn.ip_address,
-            plan_name=pname or "",
-            cell_name=cname or "",
-            created_at=conn.created_at
-        )
-        for conn, fname, lname, pname, cname in rows
+
+    # Filas planas con la forma de ConnectionListResponse: orjson codifica
+    # enums y datetimes en C, sin instanciar un modelo por fila
+    # (OPT_UTC_Z: mismas fechas "...Z" que serializa Pydantic)
+    rows = [
+        {
+            "id": row.id,
+            "client_id": row.client_id,
+            "client_name": f"{row.first_name or ''} {row.last_name or ''}".strip(),
+            "connection_type": row.connection_type,
+            "status": row.status,
+            "ip_address": row.ip_address,
+            "plan_name": row.plan_name or "",
+            "cell_name": row.cell_name or "",
+            "created_at": row.created_at,
+        }
+        for row in result
     ]
+    return Response(orjson.dumps(rows, option=orjson.OPT_UTC_Z), media_type="application/json")
 
 
 # ========== CREAR FIBRA ==========
@@ -12,6 +12,7 @@ from app.dependencies import get_db, get_current_user
 from app.models.plan import ServicePlan, PlanType, CellPlan
 from app.models.connection import Connection
 from app.models.user import User
+from app.schemas.common import trusted_response
 from app.schemas.plan import (
     ServicePlanCreate, ServicePlanUpdate,
     ServicePlanResponse, ServicePlanListResponse
@@ -39,23 +40,33 @@ async def list_plans(
     result = await db.execute(q)
     plans = result.scalars().all()
 
-    responses = []
-    for p in plans:
-        conn_count = await db.scalar(
-            select(func.count(Connection.id)).where(
-                Connection.plan_id == p.id, Connection.is_active == True
-            )
-        ) or 0
-        cell_count = await db.scalar(
-            select(func.count(CellPlan.id)).where(CellPlan.plan_id == p.id)
-        ) or 0
-        responses.append(ServicePlanListResponse(
+    # Conteos de toda la página en dos consultas agrupadas (IN + GROUP BY)
+    # en vez de dos consultas por plan
+    plan_ids = [p.id for p in plans]
+    conn_counts = {}
+    cell_counts = {}
+    if plan_ids:
+        conn_counts = dict((await db.execute(
+            select(Connection.plan_id, func.count(Connection.id))
+            .where(Connection.plan_id.in_(plan_ids), Connection.is_active == True)
+            .group_by(Connection.plan_id)
+        )).all())
+        cell_counts = dict((await db.execute(
+            select(CellPlan.plan_id, func.count(CellPlan.id))
+            .where(CellPlan.plan_id.in_(plan_ids))
+            .group_by(CellPlan.plan_id)
+        )).all())
+
+    responses = [
+        ServicePlanListResponse.model_construct(
             id=p.id, name=p.name, plan_type=p.plan_type, price=float(p.price),
             upload_speed=p.upload_speed, download_speed=p.download_speed,
             priority=p.priority, tags=p.tags, is_active=p.is_active,
-            connection_count=conn_count, cell_count=cell_count
-        ))
-    return responses
+            connection_count=conn_counts.get(p.id, 0), cell_count=cell_counts.get(p.id, 0)
+        )
+        for p in plans
+    ]
+    return trusted_response(responses)
 
 
 @router.post("/", response_model=ServicePlanResponse, status_code=201)
@@ -4,14 +4,17 @@ CRUD + seguimiento + convertir a cliente.
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, func
+from sqlalchemy.orm import selectinload
 from typing import List, Optional
 from datetime import date
 
+from app.database import strict_loading
 from app.dependencies import get_db, get_current_user
 from app.models.prospect import Prospect, ProspectStatus, ProspectFollowUp
 from app.models.client import Client, ClientType, ClientStatus
 from app.models.user import User
+from app.schemas.common import trusted_response
 from app.schemas.prospect import (
     ProspectCreate, ProspectUpdate, ProspectResponse,
     ProspectDetailResponse, FollowUpCreate, FollowUpResponse
@@ -28,12 +31,13 @@ async def list_prospects(
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user)
 ):
-    q = select(Prospect).where(Prospect.tenant_id == user.tenant_id)
+    q = select(Prospect).options(*strict_loading()).where(Prospect.tenant_id == user.tenant_id)
     if status:
         q = q.where(Prospect.status == status)
     q = q.order_by(Prospect.id.desc()).offset((page - 1) * per_page).limit(per_page)
     result = await db.execute(q)
-    return result.scalars().all()
+    # Filas propias de la BD: sin la validación por campo del response_model
+    return trusted_response([ProspectResponse.from_orm_fast(p) for p in result.scalars()])
 
 
 @router.post("/", response_model=ProspectResponse, status_code=201)
@@ -49,7 +53,6 @@ async def create_prospect(
     )
     db.add(prospect)
     await db.commit()
-    await db.refresh(prospect)
     return prospect
 
 
@@ -59,20 +62,21 @@ async def get_prospect(
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user)
 ):
-    prospect = await db.get(Prospect, prospect_id)
-    if not prospect or prospect.tenant_id != user.tenant_id:
-        raise HTTPException(404, "Prospecto no encontrado")
-
-    fups = await db.execute(
-        select(ProspectFollowUp)
-        .where(ProspectFollowUp.prospect_id == prospect_id)
-        .order_by(ProspectFollowUp.created_at.desc())
+    # Seguimientos en la misma carga (orden definido en la relación)
+    result = await db.execute(
+        select(Prospect)
+        .options(selectinload(Prospect.follow_ups), *strict_loading())
+        .where(Prospect.id == prospect_id, Prospect.tenant_id == user.tenant_id)
     )
+    prospect = result.scalar_one_or_none()
+    if not prospect:
+        raise HTTPException(404, "Prospecto no encontrado")
 
-    return ProspectDetailResponse(
-        **{k: v for k, v in prospect.__dict__.items() if not k.startswith("_")},
-        follow_ups=[FollowUpResponse.model_validate(f) for f in fups.scalars().all()]
-    )
+    # Datos propios de la BD: se construye sin validar campo por campo
+    return trusted_response(ProspectDetailResponse.from_orm_fast(
+        prospect,
+        follow_ups=[FollowUpResponse.from_orm_fast(f) for f in prospect.follow_ups],
+    ))
 
 
 @router.patch("/{prospect_id}", response_model=ProspectResponse)
@@ -82,15 +86,17 @@ async def update_prospect(
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user)
 ):
-    prospect = await db.get(Prospect, prospect_id)
-    if not prospect or prospect.tenant_id != user.tenant_id:
+    result = await db.execute(
+        update(Prospect)
+        .where(Prospect.id == prospect_id, Prospect.tenant_id == user.tenant_id)
+        .values(**data.model_dump(exclude_unset=True), updated_at=func.now())
+        .returning(Prospect)
+    )
+    prospect = result.scalar_one_or_none()
+    if not prospect:
         raise HTTPException(404, "Prospecto no encontrado")
 
-    for k, v in data.model_dump(exclude_unset=True).items():
-        setattr(prospect, k, v)
-
     await db.commit()
-    await db.refresh(prospect)
     return prospect
 
 
@@ -120,7 +126,6 @@ async def add_follow_up(
         prospect.status = ProspectStatus.CONTACTED
 
     await db.commit()
-    await db.refresh(fup)
     return fup
 
 
@@ -136,9 +141,16 @@ async def convert_to_client(
     """
     Convierte prospecto en cliente.
     Crea el registro en clients y marca el prospecto como converted.
+    La fila del prospecto queda bloqueada (FOR UPDATE) hasta el commit,
+    así dos conversiones simultáneas no crean dos clientes.
     """
-    prospect = await db.get(Prospect, prospect_id)
-    if not prospect or prospect.tenant_id != user.tenant_id:
+    result = await db.execute(
+        select(Prospect)
+        .where(Prospect.id == prospect_id, Prospect.tenant_id == user.tenant_id)
+        .with_for_update()
+    )
+    prospect = result.scalar_one_or_none()
+    if not prospect:
         raise HTTPException(404, "Prospecto no encontrado")
     if prospect.status == ProspectStatus.CONVERTED:
         raise HTTPException(400, "Prospecto ya fue convertido")
@@ -158,11 +170,11 @@ async def convert_to_client(
         status=ClientStatus.PENDING,
     )
     db.add(client)
-    await db.flush()
 
-    # Marcar prospecto como convertido
+    # Marcar prospecto como convertido; el INSERT del cliente y el UPDATE
+    # del prospecto salen en el mismo flush del commit
     prospect.status = ProspectStatus.CONVERTED
-    prospect.converted_client_id = client.id
+    prospect.converted_client = client
 
     await db.commit()
     return {
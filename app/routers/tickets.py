@@ -5,19 +5,21 @@ CRUD + notas de seguimiento + asignación + cierre.
 """
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from sqlalchemy.orm import selectinload
-from typing import Optional, List
-from datetime import datetime, timezone
+from sqlalchemy import select, insert, update, func, tuple_, and_
+from sqlalchemy.orm import selectinload, joinedload
+from typing import Optional
+from datetime import datetime
 
+from app.database import strict_loading
 from app.dependencies import get_db, get_current_user
+from app.utils.streaming import stream_json_rows
 from app.models.user import User
 from app.models.client import Client
 from app.models.ticket import Ticket, TicketNote, TicketStatus, TicketType, TicketPriority
 from app.schemas.ticket import (
-    TicketCreate, TicketUpdate, TicketAssign,
+    TicketCreate, TicketUpdate, TicketAssign, TicketBulkClose, TicketBulkCloseResponse,
     TicketResponse, TicketDetailResponse, TicketListResponse,
-    TicketNoteCreate, TicketNoteResponse
+    TicketPageResponse, TicketCursor, TicketNoteCreate, TicketNoteResponse
 )
 
 router = APIRouter(prefix="/tickets", tags=["Tickets"])
@@ -54,7 +56,6 @@ async def create_ticket(
     )
     db.add(ticket)
     await db.commit()
-    await db.refresh(ticket)
     return ticket
 
 
@@ -62,23 +63,37 @@ async def create_ticket(
 # LISTAR TICKETS
 # ════════════════════════════════════════════════════════
 
-@router.get("/", response_model=List[TicketListResponse])
+@router.get("/", response_model=TicketPageResponse)
 async def list_tickets(
     ticket_type: Optional[TicketType] = None,
     status_filter: Optional[TicketStatus] = Query(None, alias="status"),
     priority: Optional[TicketPriority] = None,
     assigned_to: Optional[int] = None,
     client_id: Optional[int] = None,
-    db: AsyncSession = Depends(get_db),
+    limit: int = Query(50, ge=1, le=200),
+    cursor_created_at: Optional[datetime] = None,
+    cursor_id: Optional[int] = None,
     user: User = Depends(get_current_user)
 ):
     """
     Listar tickets con filtros opcionales.
     Filtros: tipo, estado, prioridad, técnico asignado, cliente.
+
+    Paginación por cursor (keyset) sobre (created_at, id):
+    para la siguiente página enviar cursor_created_at y cursor_id
+    con los valores de next_cursor de la respuesta anterior.
     """
+    # Solo las columnas que muestra el listado (sin filas completas de User/Client)
     query = (
-        select(Ticket)
-        .options(selectinload(Ticket.assignee), selectinload(Ticket.client))
+        select(
+            Ticket.id, Ticket.ticket_type, Ticket.status, Ticket.priority,
+            Ticket.subject, Ticket.assigned_to, Ticket.client_id,
+            Ticket.scheduled_date, Ticket.created_at,
+            User.username.label("assignee_name"),
+            (Client.first_name + " " + Client.last_name).label("client_name"),
+        )
+        .outerjoin(User, User.id == Ticket.assigned_to)
+        .outerjoin(Client, Client.id == Ticket.client_id)
         .where(Ticket.tenant_id == user.tenant_id, Ticket.is_active == True)
     )
 
@@ -93,27 +108,33 @@ async def list_tickets(
     if client_id:
         query = query.where(Ticket.client_id == client_id)
 
-    query = query.order_by(Ticket.created_at.desc())
-
-    result = await db.execute(query)
-    tickets = result.scalars().all()
-
-    return [
-        TicketListResponse(
-            id=t.id,
-            ticket_type=t.ticket_type,
-            status=t.status,
-            priority=t.priority,
-            subject=t.subject,
-            assigned_to=t.assigned_to,
-            assignee_name=f"{t.assignee.first_name} {t.assignee.last_name}" if t.assignee and hasattr(t.assignee, 'first_name') else (t.assignee.username if t.assignee else None),
-            client_id=t.client_id,
-            client_name=f"{t.client.first_name} {t.client.last_name}" if t.client else None,
-            scheduled_date=t.scheduled_date,
-            created_at=t.created_at,
+    # El cursor va completo o no va: con una sola mitad no hay posición
+    if (cursor_created_at is None) != (cursor_id is None):
+        raise HTTPException(422, "cursor_created_at y cursor_id se envían juntos")
+    if cursor_created_at is not None:
+        query = query.where(
+            tuple_(Ticket.created_at, Ticket.id) < tuple_(cursor_created_at, cursor_id)
         )
-        for t in tickets
-    ]
+
+    query = query.order_by(Ticket.created_at.desc(), Ticket.id.desc()).limit(limit + 1)
+
+    # response_model queda para la documentación; el cuerpo se arma
+    # fila por fila con la forma de TicketPageResponse
+    return await stream_json_rows(
+        query, b'{"tickets":[', _dump_ticket_row, _ticket_page_tail, limit=limit,
+    )
+
+
+def _dump_ticket_row(row) -> bytes:
+    return TicketListResponse.model_validate(row).model_dump_json().encode()
+
+
+def _ticket_page_tail(last) -> bytes:
+    """Cierre de TicketPageResponse: si hay otra página, el cursor es la última fila enviada."""
+    if last is None:
+        return b'],"next_cursor":null}'
+    cursor = TicketCursor(created_at=last.created_at, id=last.id)
+    return b'],"next_cursor":' + cursor.model_dump_json().encode() + b"}"
 
 
 # ════════════════════════════════════════════════════════
@@ -130,10 +151,11 @@ async def get_ticket(
     result = await db.execute(
         select(Ticket)
         .options(
-            selectinload(Ticket.notes).selectinload(TicketNote.author),
-            selectinload(Ticket.assignee),
-            selectinload(Ticket.creator),
-            selectinload(Ticket.client),
+            selectinload(Ticket.notes).joinedload(TicketNote.author),
+            joinedload(Ticket.assignee),
+            joinedload(Ticket.creator),
+            joinedload(Ticket.client),
+            *strict_loading(),
         )
         .where(Ticket.id == ticket_id, Ticket.tenant_id == user.tenant_id)
     )
@@ -141,39 +163,7 @@ async def get_ticket(
     if not ticket:
         raise HTTPException(404, "Ticket no encontrado")
 
-    return TicketDetailResponse(
-        id=ticket.id,
-        tenant_id=ticket.tenant_id,
-        ticket_type=ticket.ticket_type,
-        status=ticket.status,
-        priority=ticket.priority,
-        subject=ticket.subject,
-        description=ticket.description,
-        prospect_id=ticket.prospect_id,
-        client_id=ticket.client_id,
-        connection_id=ticket.connection_id,
-        assigned_to=ticket.assigned_to,
-        created_by=ticket.created_by,
-        scheduled_date=ticket.scheduled_date,
-        resolved_at=ticket.resolved_at,
-        closed_at=ticket.closed_at,
-        is_active=ticket.is_active,
-        created_at=ticket.created_at,
-        updated_at=ticket.updated_at,
-        assignee_name=ticket.assignee.username if ticket.assignee else None,
-        creator_name=ticket.creator.username if ticket.creator else None,
-        client_name=f"{ticket.client.first_name} {ticket.client.last_name}" if ticket.client else None,
-        notes=[
-            TicketNoteResponse(
-                id=n.id,
-                note=n.note,
-                created_by=n.created_by,
-                author_name=n.author.username if n.author else None,
-                created_at=n.created_at,
-            )
-            for n in ticket.notes
-        ]
-    )
+    return ticket
 
 
 # ════════════════════════════════════════════════════════
@@ -188,31 +178,29 @@ async def update_ticket(
     user: User = Depends(get_current_user)
 ):
     """Actualizar datos del ticket (asunto, prioridad, estado, asignación, etc.)."""
+    update_data = data.model_dump(exclude_unset=True)
+
+    # Si cambia a resuelto/cerrado, registrar fecha (solo si no tenía)
+    if update_data.get("status") == TicketStatus.RESUELTO:
+        update_data["resolved_at"] = func.coalesce(Ticket.resolved_at, func.now())
+    if update_data.get("status") == TicketStatus.CERRADO:
+        update_data["closed_at"] = func.coalesce(Ticket.closed_at, func.now())
+
+    # Un solo UPDATE ... RETURNING (sin SELECT previo ni refresh)
     result = await db.execute(
-        select(Ticket).where(
+        update(Ticket)
+        .where(
             Ticket.id == ticket_id,
             Ticket.tenant_id == user.tenant_id
         )
+        .values(**update_data, updated_at=func.now())
+        .returning(Ticket)
     )
     ticket = result.scalar_one_or_none()
     if not ticket:
         raise HTTPException(404, "Ticket no encontrado")
 
-    update_data = data.model_dump(exclude_unset=True)
-
-    # Si cambia a resuelto, registrar fecha
-    if update_data.get("status") == TicketStatus.RESUELTO and not ticket.resolved_at:
-        update_data["resolved_at"] = datetime.now(timezone.utc)
-
-    # Si cambia a cerrado, registrar fecha
-    if update_data.get("status") == TicketStatus.CERRADO and not ticket.closed_at:
-        update_data["closed_at"] = datetime.now(timezone.utc)
-
-    for field, value in update_data.items():
-        setattr(ticket, field, value)
-
     await db.commit()
-    await db.refresh(ticket)
     return ticket
 
 
@@ -228,19 +216,21 @@ async def assign_ticket(
     user: User = Depends(get_current_user)
 ):
     """Asignar un técnico al ticket."""
+    # Ticket + técnico (mismo tenant) en una sola consulta
     result = await db.execute(
-        select(Ticket).where(
+        select(Ticket, User)
+        .outerjoin(User, and_(User.id == data.assigned_to, User.tenant_id == Ticket.tenant_id))
+        .where(
             Ticket.id == ticket_id,
             Ticket.tenant_id == user.tenant_id
         )
     )
-    ticket = result.scalar_one_or_none()
-    if not ticket:
+    row = result.first()
+    if not row:
         raise HTTPException(404, "Ticket no encontrado")
 
-    # Verificar que el técnico existe y es del mismo tenant
-    tech = await db.get(User, data.assigned_to)
-    if not tech or tech.tenant_id != user.tenant_id:
+    ticket, tech = row
+    if not tech:
         raise HTTPException(404, "Técnico no encontrado")
 
     ticket.assigned_to = data.assigned_to
@@ -259,7 +249,6 @@ async def assign_ticket(
     db.add(note)
 
     await db.commit()
-    await db.refresh(ticket)
     return ticket
 
 
@@ -296,7 +285,6 @@ async def add_ticket_note(
     )
     db.add(note)
     await db.commit()
-    await db.refresh(note)
 
     return TicketNoteResponse(
         id=note.id,
@@ -311,6 +299,52 @@ async def add_ticket_note(
 # CERRAR TICKET
 # ════════════════════════════════════════════════════════
 
+@router.post("/bulk/close", response_model=TicketBulkCloseResponse)
+async def bulk_close_tickets(
+    data: TicketBulkClose,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
+    """
+    Cerrar varios tickets de una vez (scripts de administración).
+    Un UPDATE para todos los tickets y un INSERT para todas las notas.
+    Los que no existen o ya están cerrados se ignoran.
+    """
+    result = await db.execute(
+        update(Ticket)
+        .where(
+            Ticket.id.in_(data.ticket_ids),
+            Ticket.tenant_id == user.tenant_id,
+            Ticket.status != TicketStatus.CERRADO,
+        )
+        .values(
+            status=TicketStatus.CERRADO,
+            resolved_at=func.coalesce(Ticket.resolved_at, func.now()),
+            closed_at=func.now(),
+            updated_at=func.now(),
+        )
+        .returning(Ticket.id)
+    )
+    closed_ids = result.scalars().all()
+
+    if closed_ids:
+        await db.execute(
+            insert(TicketNote),
+            [
+                {
+                    "tenant_id": user.tenant_id,
+                    "ticket_id": ticket_id,
+                    "note": "Ticket cerrado",
+                    "created_by": user.id,
+                }
+                for ticket_id in closed_ids
+            ],
+        )
+
+    await db.commit()
+    return {"closed": len(closed_ids), "ticket_ids": closed_ids}
+
+
 @router.post("/{ticket_id}/close", response_model=TicketResponse)
 async def close_ticket(
     ticket_id: int,
@@ -318,28 +352,36 @@ async def close_ticket(
     user: User = Depends(get_current_user)
 ):
     """Cerrar un ticket. Registra fecha de cierre."""
+    # Fechas con now() del servidor de BD, en un solo UPDATE ... RETURNING.
+    # Si no fue marcado como resuelto antes, se resuelve al cerrar
     result = await db.execute(
-        select(Ticket).where(
+        update(Ticket)
+        .where(
             Ticket.id == ticket_id,
-            Ticket.tenant_id == user.tenant_id
+            Ticket.tenant_id == user.tenant_id,
+            Ticket.status != TicketStatus.CERRADO,
         )
+        .values(
+            status=TicketStatus.CERRADO,
+            resolved_at=func.coalesce(Ticket.resolved_at, func.now()),
+            closed_at=func.now(),
+            updated_at=func.now(),
+        )
+        .returning(Ticket)
     )
     ticket = result.scalar_one_or_none()
     if not ticket:
-        raise HTTPException(404, "Ticket no encontrado")
-
-    if ticket.status == TicketStatus.CERRADO:
+        # Solo en el camino de error se distingue inexistente de ya cerrado
+        exists = await db.scalar(
+            select(Ticket.id).where(
+                Ticket.id == ticket_id,
+                Ticket.tenant_id == user.tenant_id
+            )
+        )
+        if not exists:
+            raise HTTPException(404, "Ticket no encontrado")
         raise HTTPException(400, "El ticket ya está cerrado")
 
-    now = datetime.now(timezone.utc)
-
-    # Si no fue marcado como resuelto antes, se resuelve al cerrar
-    if not ticket.resolved_at:
-        ticket.resolved_at = now
-
-    ticket.status = TicketStatus.CERRADO
-    ticket.closed_at = now
-
     # Nota automática
     note = TicketNote(
         tenant_id=user.tenant_id,
@@ -350,7 +392,6 @@ async def close_ticket(
     db.add(note)
 
     await db.commit()
-    await db.refresh(ticket)
     return ticket
 
 
@@ -388,5 +429,4 @@ async def cancel_ticket(
     db.add(note)
 
     await db.commit()
-    await db.refresh(ticket)
     return ticket
\ No newline at end of file
@@ -3,7 +3,7 @@ Sistema ISP - Router: Webhooks
 Endpoint público para recibir notificaciones de pago de tapipay.
 NO requiere autenticación JWT.
 """
-from fastapi import APIRouter, Request, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Request, HTTPException
 import logging
 
 from app.database import AsyncSessionLocal
@@ -14,24 +14,34 @@ logger = logging.getLogger("webhooks")
 router = APIRouter(prefix="/webhooks", tags=["Webhooks"])
 
 
-@router.post("/tapipay")
-async def tapipay_webhook(request: Request):
+async def _process_tapipay_webhook(body: dict):
+    """Procesa el pago fuera del request, con su propia sesión."""
+    async with AsyncSessionLocal() as db:
+        try:
+            result = await process_tapipay_payment(db, body)
+            logger.info(f"Webhook procesado: {result}")
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error procesando webhook: {e}")
+
+
+@router.post("/tapipay", status_code=202)
+async def tapipay_webhook(request: Request, background_tasks: BackgroundTasks):
     """
     Webhook de tapipay.
-    Recibe notificación de pago y procesa automáticamente.
+    Responde apenas valida el JSON y procesa el pago en segundo plano,
+    para que tapipay no reintente por demora. El procesamiento es
+    idempotente por operationId: el índice único de payments impide
+    registrar dos veces el mismo pago (los duplicados se ignoran).
     """
     try:
         body = await request.json()
     except Exception:
         raise HTTPException(400, "JSON inválido")
+    if not isinstance(body, dict):
+        raise HTTPException(400, "JSON inválido")
 
     logger.info(f"Webhook tapipay recibido: {body}")
 
-    async with AsyncSessionLocal() as db:
-        try:
-            result = await process_tapipay_payment(db, body)
-            logger.info(f"Webhook procesado: {result}")
-            return {"status": "ok", "detail": result}
-        except Exception as e:
-            logger.error(f"Error procesando webhook: {e}")
-            return {"status": "error", "detail": str(e)}
\ No newline at end of file
+    background_tasks.add_task(_process_tapipay_webhook, body)
+    return {"status": "accepted", "operation_id": body.get("operationId")}
@@ -20,15 +20,23 @@ Endpoints:
   WEBHOOK:
     POST   /webhooks/whatsapp            → Recibir mensajes de Gupshup
 """
+import asyncio
 import logging
+import random
+import time
 import httpx
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, desc
-from sqlalchemy.orm import selectinload
-from typing import Optional, List
+from sqlalchemy import select, insert, update, desc, func, literal_column, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import aliased, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Dict, List, Optional, Tuple
 
+from app.database import AsyncSessionLocal, relaxed_commit, strict_loading
 from app.dependencies import get_db, get_current_user
+from app.utils.streaming import stream_json_rows
 from app.models.user import User
 from app.models.client import Client
 from app.models.whatsapp import (
@@ -39,7 +47,7 @@ from app.schemas.whatsapp import (
     WhatsappConfigCreate, WhatsappConfigUpdate, WhatsappConfigResponse,
     SendMessageRequest, MessageResponse,
     ConversationListResponse, ConversationDetailResponse,
-    LinkClientRequest
+    LinkClientRequest, MAX_MESSAGES_PAGE
 )
 
 logger = logging.getLogger("whatsapp")
@@ -53,13 +61,86 @@ webhook_router = APIRouter(prefix="/webhooks", tags=["Webhooks"])
 
 GUPSHUP_API_URL = "https://api.gupshup.io/wa/api/v1/msg"
 
+# Cliente HTTP compartido: mantiene conexiones vivas (keep-alive / HTTP2)
+# hacia Gupshup en vez de pagar TCP+TLS en cada llamada.
+# Se cierra en el lifespan de la app (app.main).
+GUPSHUP_HTTP = httpx.AsyncClient(
+    base_url="https://api.gupshup.io",
+    http2=True,
+    timeout=10,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+)
+
+# Reintentos ante fallas transitorias de Gupshup (5xx o sin conexión)
+GUPSHUP_SEND_ATTEMPTS = 3
+GUPSHUP_RETRY_BASE = 0.1   # segundos; se duplica en cada intento (+ jitter)
+
+
+async def _post_gupshup(payload: dict, api_key: str) -> httpx.Response:
+    """
+    POST de envío a Gupshup con backoff exponencial.
+    Solo se reintenta si el pedido no llegó (error de conexión) o Gupshup
+    respondió 5xx; un timeout de lectura no se reintenta porque el mensaje
+    pudo haber salido y se duplicaría. Agotados los intentos se devuelve
+    la última respuesta o se propaga el último error.
+    """
+    for attempt in range(GUPSHUP_SEND_ATTEMPTS):
+        last = attempt == GUPSHUP_SEND_ATTEMPTS - 1
+        try:
+            # Cliente compartido: los reintentos reutilizan la conexión abierta
+            response = await GUPSHUP_HTTP.post(
+                GUPSHUP_API_URL,
+                data=payload,
+                headers={"apikey": api_key},
+                timeout=15,
+            )
+            if response.status_code < 500 or last:
+                return response
+            logger.warning(f"Gupshup {response.status_code}, reintento {attempt + 1}")
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+            if last:
+                raise
+            logger.warning(f"Gupshup sin conexión ({e!r}), reintento {attempt + 1}")
+        await asyncio.sleep(GUPSHUP_RETRY_BASE * 2 ** attempt + random.uniform(0, 0.05))
+
 
 # ================================================================
 # HELPER: Obtener config de WhatsApp del tenant
 # ================================================================
 
+# Cache en memoria por tenant: la config casi nunca cambia y se consulta
+# en cada envío. Se invalida al crear/actualizar; con varios workers
+# un cambio tarda como máximo WHATSAPP_CONFIG_TTL segundos en verse.
+WHATSAPP_CONFIG_TTL = 60
+_config_cache: Dict[int, Tuple[float, WhatsappConfig]] = {}
+# Webhook: número destino (source_phone) → tenant_id
+_source_tenant_cache: Dict[str, Tuple[float, int]] = {}
+
+
+def _invalidate_whatsapp_config(tenant_id: int) -> None:
+    _config_cache.pop(tenant_id, None)
+    # Un update puede cambiar el source_phone; el mapa es chico, se vacía entero
+    _source_tenant_cache.clear()
+
+
 async def _get_whatsapp_config(tenant_id: int, db: AsyncSession) -> WhatsappConfig:
-    """Obtiene la configuración de WhatsApp del tenant."""
+    """
+    Obtiene la configuración de WhatsApp del tenant.
+    Se memoriza en db.info, que vive lo mismo que la sesión del request,
+    y entre requests en _config_cache durante WHATSAPP_CONFIG_TTL.
+    """
+    cache_key = ("whatsapp_config", tenant_id)
+    config = db.info.get(cache_key)
+    if config is not None:
+        return config
+
+    cached = _config_cache.get(tenant_id)
+    if cached and time.monotonic() - cached[0] < WHATSAPP_CONFIG_TTL:
+        # merge(load=False) asocia la copia a esta sesión sin ir a la BD
+        config = await db.merge(cached[1], load=False)
+        db.info[cache_key] = config
+        return config
+
     result = await db.execute(
         select(WhatsappConfig).where(
             WhatsappConfig.tenant_id == tenant_id,
@@ -69,51 +150,331 @@ async def _get_whatsapp_config(tenant_id: int, db: AsyncSession) -> WhatsappConf
     config = result.scalar_one_or_none()
     if not config:
         raise HTTPException(400, "WhatsApp no configurado. Configure Gupshup primero.")
+    db.info[cache_key] = config
+    _config_cache[tenant_id] = (time.monotonic(), config)
     return config
 
 
-async def _find_or_create_conversation(
-    db: AsyncSession,
-    tenant_id: int,
-    phone_number: str,
-    contact_name: str = None
-) -> WhatsappConversation:
-    """Busca conversación existente o crea una nueva."""
-    result = await db.execute(
-        select(WhatsappConversation).where(
-            WhatsappConversation.tenant_id == tenant_id,
-            WhatsappConversation.phone_number == phone_number
+async def _get_tenant_by_source_phone(source_phone: str, db: AsyncSession) -> Optional[int]:
+    """
+    Resuelve el tenant dueño del número que recibió el mensaje.
+    Cacheado WHATSAPP_CONFIG_TTL segundos; los números sin config no se cachean.
+    """
+    cached = _source_tenant_cache.get(source_phone)
+    if cached and time.monotonic() - cached[0] < WHATSAPP_CONFIG_TTL:
+        return cached[1]
+
+    tenant_id = await db.scalar(
+        select(WhatsappConfig.tenant_id).where(
+            WhatsappConfig.source_phone == source_phone,
+            WhatsappConfig.is_active == True
         )
     )
-    conversation = result.scalar_one_or_none()
+    if tenant_id is not None:
+        _source_tenant_cache[source_phone] = (time.monotonic(), tenant_id)
+    return tenant_id
 
-    if not conversation:
-        # Auto-vincular si el número coincide con un cliente
-        client_id = None
-        client_result = await db.execute(
-            select(Client).where(
-                Client.tenant_id == tenant_id,
-                Client.phone_cell == phone_number
-            )
+
+async def _upsert_conversations(db: AsyncSession, entries: List[dict]) -> Dict[Tuple[int, str], int]:
+    """
+    Crea o actualiza las conversaciones de un lote de mensajes entrantes.
+    Un solo INSERT ... ON CONFLICT (tenant_id, phone_number) para todas:
+    las existentes suman unread_count y toman el último preview.
+    entries: una por (tenant_id, phone_number), ya agregadas.
+    Devuelve {(tenant_id, phone_number): conversation_id}.
+    """
+    excluded = pg_insert(WhatsappConversation).excluded
+    stmt = (
+        pg_insert(WhatsappConversation)
+        .values([
+            {
+                "tenant_id": e["tenant_id"],
+                "phone_number": e["phone_number"],
+                "contact_name": e["contact_name"] or None,
+                "status": ConversationStatus.ACTIVA,
+                "unread_count": e["unread_count"],
+                "last_message_at": func.now(),
+                "last_message_preview": e["last_message_preview"],
+            }
+            for e in entries
+        ])
+        .on_conflict_do_update(
+            index_elements=["tenant_id", "phone_number"],
+            set_={
+                "unread_count": func.coalesce(WhatsappConversation.unread_count, 0) + excluded.unread_count,
+                "last_message_at": excluded.last_message_at,
+                "last_message_preview": excluded.last_message_preview,
+                "contact_name": func.coalesce(WhatsappConversation.contact_name, excluded.contact_name),
+                "updated_at": func.now(),
+            },
         )
-        client = client_result.scalar_one_or_none()
-        if client:
-            client_id = client.id
-            if not contact_name:
-                contact_name = f"{client.first_name} {client.last_name}"
-
-        conversation = WhatsappConversation(
-            tenant_id=tenant_id,
-            phone_number=phone_number,
-            contact_name=contact_name,
-            client_id=client_id,
-            status=ConversationStatus.ACTIVA,
-            unread_count=0,
+        .returning(
+            WhatsappConversation.id,
+            WhatsappConversation.tenant_id,
+            WhatsappConversation.phone_number,
+            literal_column("xmax = 0").label("created"),
+        )
+    )
+    rows = (await db.execute(stmt)).all()
+    conv_ids = {(r.tenant_id, r.phone_number): r.id for r in rows}
+
+    # Auto-vincular si el número coincide con un cliente (solo conversaciones nuevas)
+    created = [(r.tenant_id, r.phone_number) for r in rows if r.created]
+    if created:
+        clients = await db.execute(
+            select(Client.id, Client.tenant_id, Client.phone_cell, Client.first_name, Client.last_name)
+            .where(tuple_(Client.tenant_id, Client.phone_cell).in_(created))
+        )
+        linked = set()
+        for c in clients:
+            key = (c.tenant_id, c.phone_cell)
+            if key in linked:
+                continue
+            linked.add(key)
+            await db.execute(
+                update(WhatsappConversation)
+                .where(WhatsappConversation.id == conv_ids[key])
+                .values(
+                    client_id=c.id,
+                    contact_name=func.coalesce(
+                        WhatsappConversation.contact_name, f"{c.first_name} {c.last_name}"
+                    ),
+                )
+            )
+
+    return conv_ids
+
+
+# ================================================================
+# HELPER: Procesamiento del webhook fuera del request
+# ================================================================
+
+# Tipos de mensaje y estados de Gupshup → enums propios (constantes del módulo,
+# no se arman de nuevo en cada evento del webhook)
+GUPSHUP_TYPE_MAP = {
+    "text": MessageType.TEXT,
+    "image": MessageType.IMAGE,
+    "document": MessageType.DOCUMENT,
+    "audio": MessageType.AUDIO,
+    "video": MessageType.VIDEO,
+    "location": MessageType.LOCATION,
+    "sticker": MessageType.STICKER,
+}
+GUPSHUP_STATUS_MAP = {
+    "delivered": MessageStatus.DELIVERED,
+    "read": MessageStatus.READ,
+}
+
+# El webhook solo valida y encola; Gupshup recibe el 200 sin esperar a la BD.
+# Los workers (arrancados en el lifespan de app.main) juntan lo que llega en
+# WEBHOOK_FLUSH_INTERVAL segundos y lo aplican en una sola transacción.
+WEBHOOK_FLUSH_INTERVAL = 0.05
+STATUS_BATCH_MAX = 500
+INBOUND_BATCH_MAX = 32
+INBOUND_QUEUE_MAX = 10_000
+
+_status_queue: "asyncio.Queue[Optional[Tuple[str, MessageStatus]]]" = asyncio.Queue()
+_inbound_queue: "asyncio.Queue[Optional[dict]]" = asyncio.Queue(maxsize=INBOUND_QUEUE_MAX)
+_webhook_workers: List[asyncio.Task] = []
+
+
+async def _drain_batch(queue: asyncio.Queue, max_items: int) -> Tuple[list, bool]:
+    """
+    Espera el primer elemento y junta los que lleguen durante
+    WEBHOOK_FLUSH_INTERVAL (hasta max_items). None en la cola = detener.
+    Devuelve (lote, detener).
+    """
+    loop = asyncio.get_running_loop()
+    item = await queue.get()
+    if item is None:
+        return [], True
+
+    batch = [item]
+    deadline = loop.time() + WEBHOOK_FLUSH_INTERVAL
+    while len(batch) < max_items:
+        timeout = deadline - loop.time()
+        if timeout <= 0:
+            break
+        try:
+            item = await asyncio.wait_for(queue.get(), timeout)
+        except asyncio.TimeoutError:
+            break
+        if item is None:
+            return batch, True
+        batch.append(item)
+    return batch, False
+
+
+async def _flush_status_events(events: List[Tuple[str, MessageStatus]]) -> None:
+    """Aplica un lote de eventos de estado: un UPDATE ... IN (...) por estado."""
+    # Si en el lote llegan delivered y read del mismo mensaje, gana read
+    read_ids = {gid for gid, st in events if st == MessageStatus.READ}
+    delivered_ids = {gid for gid, st in events if st == MessageStatus.DELIVERED} - read_ids
+
+    async with AsyncSessionLocal() as db:
+        await relaxed_commit(db)
+        if read_ids:
+            await db.execute(
+                update(WhatsappMessage)
+                .where(WhatsappMessage.gupshup_message_id.in_(read_ids))
+                .values(status=MessageStatus.READ)
+            )
+        if delivered_ids:
+            # No retroceder un mensaje que ya figura como leído
+            await db.execute(
+                update(WhatsappMessage)
+                .where(
+                    WhatsappMessage.gupshup_message_id.in_(delivered_ids),
+                    WhatsappMessage.status != MessageStatus.READ
+                )
+                .values(status=MessageStatus.DELIVERED)
+            )
+        await db.commit()
+
+
+async def _parse_inbound_message(payload: dict, db: AsyncSession) -> Optional[dict]:
+    """Arma la fila del mensaje entrante; None si el número destino no tiene config."""
+    msg_type = payload.get("type", "text")
+
+    # Extraer contenido según tipo
+    content = ""
+    media_url = None
+    media_filename = None
+
+    if msg_type == "text":
+        content = payload.get("payload", {}).get("text", "")
+    elif msg_type in ("image", "document", "audio", "video"):
+        content = payload.get("payload", {}).get("caption", "")
+        media_url = payload.get("payload", {}).get("url", "")
+        media_filename = payload.get("payload", {}).get("name", "")
+    elif msg_type == "location":
+        loc = payload.get("payload", {})
+        content = f"📍 {loc.get('latitude', '')}, {loc.get('longitude', '')}"
+
+    # Determinar tenant por el número destino (source_phone del config)
+    dest_phone = payload.get("destination", "")
+    tenant_id = await _get_tenant_by_source_phone(dest_phone, db)
+
+    if tenant_id is None:
+        logger.warning(f"Webhook WhatsApp: no config para número {dest_phone}")
+        return None
+
+    return {
+        "tenant_id": tenant_id,
+        "phone_number": payload.get("source", ""),
+        "contact_name": payload.get("sender", {}).get("name", ""),
+        "message_type": GUPSHUP_TYPE_MAP.get(msg_type, MessageType.TEXT),
+        "content": content,
+        "media_url": media_url,
+        "media_filename": media_filename,
+        "gupshup_message_id": payload.get("id", ""),
+        "preview": content[:300] if content else f"[{msg_type}]",
+    }
+
+
+async def _store_inbound_messages(payloads: List[dict]) -> None:
+    """
+    Guarda un lote de mensajes entrantes en una sola transacción:
+    un upsert para las conversaciones y un INSERT para los mensajes.
+    """
+    async with AsyncSessionLocal() as db:
+        parsed = []
+        for payload in payloads:
+            try:
+                msg = await _parse_inbound_message(payload, db)
+            except Exception as e:
+                logger.error(f"Mensaje WhatsApp inválido de {payload.get('source')}: {e}")
+                continue
+            if msg:
+                parsed.append(msg)
+        if not parsed:
+            return
+
+        # Una entrada por conversación; la cola respeta el orden de llegada,
+        # así que el último mensaje del lote define el preview
+        entries: Dict[Tuple[int, str], dict] = {}
+        for msg in parsed:
+            key = (msg["tenant_id"], msg["phone_number"])
+            entry = entries.setdefault(key, {
+                "tenant_id": msg["tenant_id"],
+                "phone_number": msg["phone_number"],
+                "contact_name": "",
+                "unread_count": 0,
+            })
+            entry["unread_count"] += 1
+            entry["last_message_preview"] = msg["preview"]
+            entry["contact_name"] = entry["contact_name"] or msg["contact_name"]
+
+        conv_ids = await _upsert_conversations(db, list(entries.values()))
+
+        await db.execute(
+            insert(WhatsappMessage),
+            [
+                {
+                    "tenant_id": msg["tenant_id"],
+                    "conversation_id": conv_ids[(msg["tenant_id"], msg["phone_number"])],
+                    "direction": MessageDirection.INBOUND,
+                    "message_type": msg["message_type"],
+                    "content": msg["content"],
+                    "media_url": msg["media_url"],
+                    "media_filename": msg["media_filename"],
+                    "gupshup_message_id": msg["gupshup_message_id"],
+                    "status": MessageStatus.DELIVERED,
+                }
+                for msg in parsed
+            ],
         )
-        db.add(conversation)
-        await db.flush()
+        await db.commit()
+
+    for key, entry in entries.items():
+        logger.info(f"WhatsApp inbound: {key[1]} → tenant {key[0]} ({entry['unread_count']} mensajes)")
+
 
-    return conversation
+async def _flush_inbound_messages(payloads: List[dict]) -> None:
+    """Aplica un lote; si falla, reintenta mensaje por mensaje para no perder el resto."""
+    try:
+        await _store_inbound_messages(payloads)
+    except Exception as e:
+        if len(payloads) == 1:
+            raise
+        logger.error(f"Error guardando lote WhatsApp ({len(payloads)}), reintento individual: {e}")
+        for payload in payloads:
+            try:
+                await _store_inbound_messages([payload])
+            except Exception as e:
+                logger.error(f"Error guardando mensaje WhatsApp de {payload.get('source')}: {e}")
+
+
+async def _run_webhook_worker(queue: asyncio.Queue, max_items: int, flush, label: str) -> None:
+    while True:
+        batch, stop = await _drain_batch(queue, max_items)
+        if batch:
+            try:
+                await flush(batch)
+            except Exception as e:
+                logger.error(f"Error procesando {label} WhatsApp ({len(batch)}): {e}")
+        if stop:
+            return
+
+
+def start_webhook_workers() -> None:
+    # Un worker por cola: los mensajes de una conversación se aplican en orden
+    _webhook_workers.extend([
+        asyncio.create_task(_run_webhook_worker(
+            _status_queue, STATUS_BATCH_MAX, _flush_status_events, "estados")),
+        asyncio.create_task(_run_webhook_worker(
+            _inbound_queue, INBOUND_BATCH_MAX, _flush_inbound_messages, "mensajes")),
+    ])
+
+
+async def stop_webhook_workers() -> None:
+    """Aplica lo que quede en las colas y detiene los workers."""
+    if not _webhook_workers:
+        return
+    await _status_queue.put(None)
+    await _inbound_queue.put(None)
+    await asyncio.gather(*_webhook_workers)
+    _webhook_workers.clear()
 
 
 # ================================================================
@@ -147,6 +508,7 @@ async def create_whatsapp_config(
     db.add(config)
     await db.commit()
     await db.refresh(config)
+    _invalidate_whatsapp_config(user.tenant_id)
     return config
 
 
@@ -169,21 +531,20 @@ async def update_whatsapp_config(
 ):
     """Actualizar configuración de WhatsApp."""
     result = await db.execute(
-        select(WhatsappConfig).where(
+        update(WhatsappConfig)
+        .where(
             WhatsappConfig.id == config_id,
             WhatsappConfig.tenant_id == user.tenant_id
         )
+        .values(**data.model_dump(exclude_unset=True), updated_at=func.now())
+        .returning(WhatsappConfig)
     )
     config = result.scalar_one_or_none()
     if not config:
         raise HTTPException(404, "Configuración no encontrada")
 
-    update_data = data.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(config, key, value)
-
     await db.commit()
-    await db.refresh(config)
+    _invalidate_whatsapp_config(user.tenant_id)
     return config
 
 
@@ -196,14 +557,14 @@ async def test_whatsapp_connection(
     config = await _get_whatsapp_config(user.tenant_id, db)
 
     try:
-        async with httpx.AsyncClient() as client:
-            # Gupshup health check - listar templates
-            response = await client.get(
-                f"https://api.gupshup.io/wa/app/{config.app_name}/template/list",
-                headers={"apikey": config.api_key},
-                timeout=10,
-            )
-
+        # Gupshup health check - listar templates. Solo interesa el status:
+        # con stream() el listado no se descarga ni se parsea si responde 200
+        async with GUPSHUP_HTTP.stream(
+            "GET",
+            f"/wa/app/{config.app_name}/template/list",
+            headers={"apikey": config.api_key},
+            timeout=3,
+        ) as response:
             if response.status_code == 200:
                 return {
                     "connected": True,
@@ -211,11 +572,11 @@ async def test_whatsapp_connection(
                     "source_phone": config.source_phone,
                     "message": "Conexión exitosa con Gupshup"
                 }
-            else:
-                return {
-                    "connected": False,
-                    "error": f"Gupshup respondió {response.status_code}: {response.text}"
-                }
+            await response.aread()
+            return {
+                "connected": False,
+                "error": f"Gupshup respondió {response.status_code}: {response.text}"
+            }
     except Exception as e:
         return {"connected": False, "error": str(e)}
 
@@ -237,8 +598,19 @@ async def list_conversations(
     Bandeja de conversaciones WhatsApp.
     Ordenadas por último mensaje (más recientes primero).
     """
-    query = select(WhatsappConversation).where(
-        WhatsappConversation.tenant_id == user.tenant_id
+    # Solo las columnas de la bandeja + nombre del cliente vinculado en el
+    # mismo SELECT; filas planas, sin hidratar objetos ORM
+    query = (
+        select(
+            WhatsappConversation.id, WhatsappConversation.phone_number,
+            WhatsappConversation.contact_name, WhatsappConversation.client_id,
+            WhatsappConversation.status, WhatsappConversation.unread_count,
+            WhatsappConversation.last_message_at, WhatsappConversation.last_message_preview,
+            WhatsappConversation.created_at,
+            (Client.first_name + " " + Client.last_name).label("client_name"),
+        )
+        .outerjoin(Client, Client.id == WhatsappConversation.client_id)
+        .where(WhatsappConversation.tenant_id == user.tenant_id)
     )
 
     if status_filter:
@@ -251,74 +623,61 @@ async def list_conversations(
     query = query.offset(offset).limit(limit)
 
     result = await db.execute(query)
-    conversations = result.scalars().all()
-
-    # Agregar nombre del cliente si está vinculado
-    response = []
-    for conv in conversations:
-        conv_dict = {
-            "id": conv.id,
-            "phone_number": conv.phone_number,
-            "contact_name": conv.contact_name,
-            "client_id": conv.client_id,
-            "client_name": None,
-            "status": conv.status,
-            "unread_count": conv.unread_count,
-            "last_message_at": conv.last_message_at,
-            "last_message_preview": conv.last_message_preview,
-            "created_at": conv.created_at,
-        }
-
-        if conv.client_id:
-            client = await db.get(Client, conv.client_id)
-            if client:
-                conv_dict["client_name"] = f"{client.first_name} {client.last_name}"
-
-        response.append(conv_dict)
-
-    return response
+    return result.mappings().all()
 
 
 @router.get("/conversations/{conversation_id}", response_model=ConversationDetailResponse)
 async def get_conversation(
     conversation_id: int,
+    limit: int = Query(100, ge=1, le=MAX_MESSAGES_PAGE),
+    before_id: Optional[int] = None,
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    """Ver una conversación con todos sus mensajes."""
+    """
+    Ver una conversación con sus mensajes más recientes.
+    Devuelve como máximo `limit` mensajes en orden cronológico; para
+    cargar los anteriores enviar before_id con el id del más antiguo.
+    """
+    # Marcar como leída y traer la conversación en un solo UPDATE ... RETURNING
+    await relaxed_commit(db)
     result = await db.execute(
-        select(WhatsappConversation)
-        .options(selectinload(WhatsappConversation.messages))
+        update(WhatsappConversation)
         .where(
             WhatsappConversation.id == conversation_id,
             WhatsappConversation.tenant_id == user.tenant_id
         )
+        .values(unread_count=0)
+        .returning(WhatsappConversation)
+        .options(selectinload(WhatsappConversation.client), *strict_loading())
     )
     conversation = result.scalar_one_or_none()
     if not conversation:
         raise HTTPException(404, "Conversación no encontrada")
 
-    # Marcar como leída
-    conversation.unread_count = 0
+    # Últimos N mensajes (índice conversation_id, id DESC) en vez de todo el
+    # historial; la consulta externa los devuelve en orden cronológico
+    msg_query = select(WhatsappMessage).where(WhatsappMessage.conversation_id == conversation.id)
+    if before_id:
+        msg_query = msg_query.where(WhatsappMessage.id < before_id)
+    page = aliased(WhatsappMessage, msg_query.order_by(WhatsappMessage.id.desc()).limit(limit).subquery())
+    msg_query = select(page).order_by(page.id)
+
     await db.commit()
 
-    # Nombre del cliente
-    client_name = None
-    if conversation.client_id:
-        client = await db.get(Client, conversation.client_id)
-        if client:
-            client_name = f"{client.first_name} {client.last_name}"
+    # Cabecera con el response_model (sin mensajes); los mensajes se
+    # serializan uno por uno a medida que llegan las filas
+    set_committed_value(conversation, "messages", [])
+    header = ConversationDetailResponse.model_validate(conversation).model_dump_json(exclude={"messages"})
 
-    return {
-        "id": conversation.id,
-        "phone_number": conversation.phone_number,
-        "contact_name": conversation.contact_name,
-        "client_id": conversation.client_id,
-        "client_name": client_name,
-        "status": conversation.status,
-        "unread_count": 0,
-        "messages": conversation.messages,
-    }
+    return await stream_json_rows(
+        msg_query, header.encode()[:-1] + b',"messages":[',
+        _dump_message, lambda _: b"]}", scalars=True,
+    )
+
+
+def _dump_message(message) -> bytes:
+    return MessageResponse.model_validate(message).model_dump_json().encode()
 
 
 @router.post("/conversations/{conversation_id}/send", response_model=MessageResponse)
@@ -332,48 +691,41 @@ async def send_message(
     Enviar mensaje WhatsApp al cliente desde la plataforma.
     Usa Gupshup API para entregar el mensaje.
     """
-    # Obtener conversación
-    result = await db.execute(
-        select(WhatsappConversation).where(
+    # Config (normalmente desde el cache, sin ir a la BD)
+    config = await _get_whatsapp_config(user.tenant_id, db)
+
+    # Solo hace falta el número de la conversación para enviar
+    phone_number = await db.scalar(
+        select(WhatsappConversation.phone_number).where(
             WhatsappConversation.id == conversation_id,
             WhatsappConversation.tenant_id == user.tenant_id
         )
     )
-    conversation = result.scalar_one_or_none()
-    if not conversation:
+    if phone_number is None:
         raise HTTPException(404, "Conversación no encontrada")
 
-    # Obtener config
-    config = await _get_whatsapp_config(user.tenant_id, db)
-
     # Enviar vía Gupshup
     gupshup_message_id = None
     send_status = MessageStatus.SENT
 
     try:
-        async with httpx.AsyncClient() as client:
-            payload = {
-                "channel": "whatsapp",
-                "source": config.source_phone,
-                "destination": conversation.phone_number,
-                "message": '{"type":"text","text":"' + data.message + '"}',
-                "src.name": config.app_name,
-            }
+        payload = {
+            "channel": "whatsapp",
+            "source": config.source_phone,
+            "destination": phone_number,
+            "message": orjson.dumps({"type": "text", "text": data.message}).decode(),
+            "src.name": config.app_name,
+        }
 
-            response = await client.post(
-                GUPSHUP_API_URL,
-                data=payload,
-                headers={"apikey": config.api_key},
-                timeout=15,
-            )
+        response = await _post_gupshup(payload, config.api_key)
 
-            if response.status_code == 200:
-                resp_data = response.json()
-                gupshup_message_id = resp_data.get("messageId")
-                send_status = MessageStatus.SENT
-            else:
-                logger.error(f"Gupshup error: {response.status_code} {response.text}")
-                send_status = MessageStatus.FAILED
+        if response.status_code == 200:
+            resp_data = response.json()
+            gupshup_message_id = resp_data.get("messageId")
+            send_status = MessageStatus.SENT
+        else:
+            logger.error(f"Gupshup error: {response.status_code} {response.text}")
+            send_status = MessageStatus.FAILED
 
     except Exception as e:
         logger.error(f"Error enviando WhatsApp: {e}")
@@ -382,7 +734,7 @@ async def send_message(
     # Guardar mensaje en BD
     message = WhatsappMessage(
         tenant_id=user.tenant_id,
-        conversation_id=conversation.id,
+        conversation_id=conversation_id,
         direction=MessageDirection.OUTBOUND,
         message_type=data.message_type,
         content=data.message,
@@ -392,12 +744,15 @@ async def send_message(
     )
     db.add(message)
 
-    # Actualizar conversación
-    conversation.last_message_at = message.created_at
-    conversation.last_message_preview = data.message[:300]
+    # Actualizar conversación (el INSERT del mensaje sale en el autoflush
+    # de este mismo execute; created_at vuelve por RETURNING, sin refresh)
+    await db.execute(
+        update(WhatsappConversation)
+        .where(WhatsappConversation.id == conversation_id)
+        .values(last_message_at=func.now(), last_message_preview=data.message[:300])
+    )
 
     await db.commit()
-    await db.refresh(message)
 
     if send_status == MessageStatus.FAILED:
         raise HTTPException(502, "Error al enviar mensaje por WhatsApp")
@@ -414,21 +769,25 @@ async def update_conversation(
     user: User = Depends(get_current_user),
 ):
     """Actualizar conversación: marcar como leída o cambiar estado."""
-    result = await db.execute(
-        select(WhatsappConversation).where(
-            WhatsappConversation.id == conversation_id,
-            WhatsappConversation.tenant_id == user.tenant_id
-        )
-    )
-    conversation = result.scalar_one_or_none()
-    if not conversation:
-        raise HTTPException(404, "Conversación no encontrada")
-
+    values = {}
     if mark_read:
-        conversation.unread_count = 0
-
+        values["unread_count"] = 0
     if status_update:
-        conversation.status = status_update
+        values["status"] = status_update
+
+    where = (
+        WhatsappConversation.id == conversation_id,
+        WhatsappConversation.tenant_id == user.tenant_id
+    )
+    # Un solo UPDATE ... RETURNING id; sin cambios basta verificar que exista
+    if values:
+        await relaxed_commit(db)
+        stmt = update(WhatsappConversation).where(*where).values(**values).returning(WhatsappConversation.id)
+    else:
+        stmt = select(WhatsappConversation.id).where(*where)
+    result = await db.execute(stmt)
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(404, "Conversación no encontrada")
 
     await db.commit()
     return {"message": "Conversación actualizada"}
@@ -461,6 +820,7 @@ async def link_conversation_to_client(
     conversation.client_id = data.client_id
     conversation.contact_name = f"{client.first_name} {client.last_name}"
 
+    await relaxed_commit(db)
     await db.commit()
     return {
         "message": f"Conversación vinculada a {client.first_name} {client.last_name}",
@@ -473,18 +833,18 @@ async def link_conversation_to_client(
 # ================================================================
 
 @webhook_router.post("/whatsapp")
-async def whatsapp_webhook(
-    request: Request,
-    db: AsyncSession = Depends(get_db),
-):
+async def whatsapp_webhook(request: Request):
     """
     Webhook para recibir mensajes de Gupshup.
     Gupshup envía aquí cada mensaje que un cliente manda por WhatsApp.
     Este endpoint es PÚBLICO (sin JWT).
     """
+    # orjson también para decodificar: es el camino más caliente del módulo
     try:
-        body = await request.json()
-    except Exception:
+        body = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        body = {}
+    if not isinstance(body, dict):
         body = {}
 
     event_type = body.get("type", "")
@@ -492,109 +852,27 @@ async def whatsapp_webhook(
 
     # --- Mensaje entrante ---
     if event_type == "message":
-        sender_phone = payload.get("source", "")
-        sender_name = payload.get("sender", {}).get("name", "")
-        msg_type = payload.get("type", "text")
-        msg_id = payload.get("id", "")
-
-        # Extraer contenido según tipo
-        content = ""
-        media_url = None
-        media_filename = None
-
-        if msg_type == "text":
-            content = payload.get("payload", {}).get("text", "")
-        elif msg_type in ("image", "document", "audio", "video"):
-            content = payload.get("payload", {}).get("caption", "")
-            media_url = payload.get("payload", {}).get("url", "")
-            media_filename = payload.get("payload", {}).get("name", "")
-        elif msg_type == "location":
-            loc = payload.get("payload", {})
-            content = f"📍 {loc.get('latitude', '')}, {loc.get('longitude', '')}"
-
-        if not sender_phone:
+        if not payload.get("source", ""):
             return {"status": "ignored", "reason": "no sender phone"}
 
-        # Determinar tenant por el número destino (source_phone del config)
-        dest_phone = payload.get("destination", "")
-        config_result = await db.execute(
-            select(WhatsappConfig).where(
-                WhatsappConfig.source_phone == dest_phone,
-                WhatsappConfig.is_active == True
-            )
-        )
-        config = config_result.scalar_one_or_none()
-
-        if not config:
-            logger.warning(f"Webhook WhatsApp: no config para número {dest_phone}")
-            return {"status": "ignored", "reason": "no config found"}
-
-        tenant_id = config.tenant_id
-
-        # Buscar o crear conversación
-        conversation = await _find_or_create_conversation(
-            db, tenant_id, sender_phone, sender_name
-        )
-
-        # Mapear tipo de mensaje
-        type_map = {
-            "text": MessageType.TEXT,
-            "image": MessageType.IMAGE,
-            "document": MessageType.DOCUMENT,
-            "audio": MessageType.AUDIO,
-            "video": MessageType.VIDEO,
-            "location": MessageType.LOCATION,
-            "sticker": MessageType.STICKER,
-        }
-
-        # Guardar mensaje
-        message = WhatsappMessage(
-            tenant_id=tenant_id,
-            conversation_id=conversation.id,
-            direction=MessageDirection.INBOUND,
-            message_type=type_map.get(msg_type, MessageType.TEXT),
-            content=content,
-            media_url=media_url,
-            media_filename=media_filename,
-            gupshup_message_id=msg_id,
-            status=MessageStatus.DELIVERED,
-        )
-        db.add(message)
-
-        # Actualizar conversación
-        conversation.unread_count = (conversation.unread_count or 0) + 1
-        conversation.last_message_at = func.now()
-        conversation.last_message_preview = content[:300] if content else f"[{msg_type}]"
-
-        if sender_name and not conversation.contact_name:
-            conversation.contact_name = sender_name
-
-        await db.commit()
-
-        logger.info(f"WhatsApp inbound: {sender_phone} → tenant {tenant_id}")
-        return {"status": "ok", "message_id": message.id}
+        # Se guarda en lote desde _flush_inbound_messages
+        try:
+            _inbound_queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            # Gupshup reintenta ante un error 5xx
+            raise HTTPException(503, "Webhook saturado, reintentar")
+        return {"status": "queued"}
 
     # --- Evento de estado (delivered, read) ---
     elif event_type == "message-event":
         event_status = payload.get("type", "")
         gupshup_id = payload.get("id", "")
 
-        if gupshup_id and event_status in ("delivered", "read"):
-            status_map = {
-                "delivered": MessageStatus.DELIVERED,
-                "read": MessageStatus.READ,
-            }
-            await db.execute(
-                update(WhatsappMessage)
-                .where(WhatsappMessage.gupshup_message_id == gupshup_id)
-                .values(status=status_map[event_status])
-            )
-            await db.commit()
+        new_status = GUPSHUP_STATUS_MAP.get(event_status)
+        if gupshup_id and new_status:
+            # Se aplica en lote desde _flush_status_events
+            _status_queue.put_nowait((gupshup_id, new_status))
 
         return {"status": "ok", "event": event_status}
 
     return {"status": "ignored", "type": event_type}
-
-
-# Necesario importar func para last_message_at
-from sqlalchemy import func
\ No newline at end of file
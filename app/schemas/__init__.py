@@ -13,4 +13,4 @@ from app.schemas.cell import *
 from app.schemas.network import *
 from app.schemas.plan import *
 from app.schemas.connection import *
-from app.schemas.inventory import *
\ No newline at end of file
+from app.schemas.inventory import *
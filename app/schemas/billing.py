@@ -120,6 +120,7 @@ class InvoiceResponse(BaseModel):
 
     class Config:
         from_attributes = True
+        frozen = True
 
 
 class GenerateBillingRequest(BaseModel):
@@ -161,6 +162,7 @@ class PaymentResponse(BaseModel):
 
     class Config:
         from_attributes = True
+        frozen = True
 
 
 # ================================================================
@@ -132,6 +132,7 @@ class CellResponse(CellBase):
 
     class Config:
         from_attributes = True
+        frozen = True
 
 
 class CellListResponse(BaseModel):
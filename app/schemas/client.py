@@ -104,6 +104,7 @@ class ClientResponse(ClientBase):
 
     class Config:
         from_attributes = True
+        frozen = True
 
 
 class ClientListResponse(BaseModel):
@@ -121,6 +122,15 @@ class ClientListResponse(BaseModel):
 
     class Config:
         from_attributes = True
+        frozen = True
+
+
+class ClientPageResponse(BaseModel):
+    """Página del listado de clientes (forma concreta, sin genéricos)."""
+    clients: List[ClientResponse]
+    total: int
+    page: int
+    per_page: int
 
 
 # --- Client Tag ---
@@ -5,6 +5,7 @@ from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 from app.models.client_file import FileCategory
+from app.schemas.common import ORMModel
 
 
 class ClientFileUpload(BaseModel):
@@ -13,7 +14,7 @@ class ClientFileUpload(BaseModel):
     description: Optional[str] = Field(None, max_length=255)
 
 
-class ClientFileResponse(BaseModel):
+class ClientFileResponse(ORMModel):
     id: int
     client_id: int
     file_name: str
@@ -24,11 +25,8 @@ class ClientFileResponse(BaseModel):
     uploaded_by: Optional[int]
     created_at: datetime
 
-    class Config:
-        from_attributes = True
 
-
-class ClientFileListResponse(BaseModel):
+class ClientFileListResponse(ORMModel):
     id: int
     file_name: str
     file_type: str
@@ -36,6 +34,3 @@ class ClientFileListResponse(BaseModel):
     category: FileCategory
     description: Optional[str]
     created_at: datetime
-
-    class Config:
-        from_attributes = True
\ No newline at end of file
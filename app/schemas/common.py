@@ -1,8 +1,9 @@
 """
 Sistema ISP - Schemas comunes
 """
-from pydantic import BaseModel
-from typing import Generic, TypeVar, List, Optional
+from fastapi import Response
+from pydantic import BaseModel, ConfigDict
+from typing import Dict, Generic, TypeVar, List, Optional, Tuple, Union
 
 T = TypeVar("T")
 
@@ -18,3 +19,44 @@ class PaginatedResponse(BaseModel, Generic[T]):
 class MessageResponse(BaseModel):
     message: str
     detail: Optional[str] = None
+
+
+class ORMModel(BaseModel):
+    """Base para schemas que se leen desde objetos ORM (from_attributes)."""
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Nombres de campos por schema, calculados una vez (from_orm_fast corre por fila)
+_ORM_FIELDS: Dict[type, Tuple[str, ...]] = {}
+
+
+class TrustedFromORM:
+    """
+    Mixin para schemas de respuesta armados desde filas de la BD propia.
+    from_orm_fast copia los atributos con model_construct, sin la cadena
+    de validadores por campo. Solo para datos confiables (ya validados al
+    guardarse); las relaciones anidadas se pasan ya construidas en **values.
+    """
+
+    @classmethod
+    def from_orm_fast(cls, obj, **values):
+        fields = _ORM_FIELDS.get(cls)
+        if fields is None:
+            fields = _ORM_FIELDS[cls] = tuple(cls.model_fields)
+        for name in fields:
+            if name not in values:
+                values[name] = getattr(obj, name)
+        return cls.model_construct(**values)
+
+
+def trusted_response(content: Union[BaseModel, List[BaseModel]]) -> Response:
+    """
+    Serializa schemas ya construidos (model_construct / from_orm_fast).
+    Al devolver un Response, FastAPI no vuelve a validar contra el
+    response_model, que queda solo para la documentación.
+    """
+    if isinstance(content, list):
+        body = b"[" + b",".join(m.model_dump_json().encode() for m in content) + b"]"
+    else:
+        body = content.model_dump_json().encode()
+    return Response(content=body, media_type="application/json")
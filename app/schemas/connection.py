@@ -8,6 +8,7 @@ from datetime import date, datetime
 from app.models.connection import (
     ConnectionType, ConnectionStatus, BridgeRouterMode, CancelReason
 )
+from app.schemas.common import ORMModel
 
 
 # --- Crear conexión FIBRA ---
@@ -100,7 +101,7 @@ class AuthorizeOnuRequest(BaseModel):
 
 
 # --- Update ---
-class ConnectionUpdate(BaseModel):
+class ConnectionUpdate(ORMModel):
     status: Optional[ConnectionStatus] = None
     ip_address: Optional[str] = None
     plan_id: Optional[int] = None
@@ -108,9 +109,6 @@ class ConnectionUpdate(BaseModel):
     longitude: Optional[str] = None
     notes: Optional[str] = None
 
-    class Config:
-        from_attributes = True
-
 
 # --- Cancelar conexión ---
 class ConnectionCancelRequest(BaseModel):
@@ -119,7 +117,7 @@ class ConnectionCancelRequest(BaseModel):
 
 
 # --- Responses ---
-class ConnectionResponse(BaseModel):
+class ConnectionResponse(ORMModel):
     id: int
     tenant_id: int
     client_id: int
@@ -157,11 +155,8 @@ class ConnectionResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
-class ConnectionListResponse(BaseModel):
+class ConnectionListResponse(ORMModel):
     id: int
     client_id: int
     client_name: str = ""
@@ -171,6 +166,3 @@ class ConnectionListResponse(BaseModel):
     plan_name: str = ""
     cell_name: str = ""
     created_at: datetime
-
-    class Config:
-        from_attributes = True
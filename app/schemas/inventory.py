@@ -5,6 +5,7 @@ MAC única por tenant validada a nivel app.
 from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import date, datetime
+from app.schemas.common import ORMModel
 
 
 # --- Brand ---
@@ -12,14 +13,11 @@ class BrandCreate(BaseModel):
     name: str = Field(..., max_length=100)
 
 
-class BrandResponse(BaseModel):
+class BrandResponse(ORMModel):
     id: int
     name: str
     is_active: bool
 
-    class Config:
-        from_attributes = True
-
 
 # --- Device Model ---
 class DeviceModelCreate(BaseModel):
@@ -28,16 +26,13 @@ class DeviceModelCreate(BaseModel):
     device_type: str                              # "onu", "cpe", "router"
 
 
-class DeviceModelResponse(BaseModel):
+class DeviceModelResponse(ORMModel):
     id: int
     brand_id: int
     name: str
     device_type: str
     is_active: bool
 
-    class Config:
-        from_attributes = True
-
 
 # --- Supplier ---
 class SupplierCreate(BaseModel):
@@ -48,7 +43,7 @@ class SupplierCreate(BaseModel):
     phone: Optional[str] = None
 
 
-class SupplierResponse(BaseModel):
+class SupplierResponse(ORMModel):
     id: int
     name: str
     balance: float
@@ -59,9 +54,6 @@ class SupplierResponse(BaseModel):
     is_active: bool
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 # --- ONU ---
 class OnuCreate(BaseModel):
@@ -76,16 +68,13 @@ class OnuCreate(BaseModel):
     password_encrypted: Optional[str] = None
 
 
-class OnuUpdate(BaseModel):
+class OnuUpdate(ORMModel):
     detail: Optional[str] = None
     is_active: Optional[bool] = None
     port: Optional[str] = None
 
-    class Config:
-        from_attributes = True
 
-
-class OnuResponse(BaseModel):
+class OnuResponse(ORMModel):
     id: int
     model_id: Optional[int]
     mac_address: str
@@ -96,11 +85,8 @@ class OnuResponse(BaseModel):
     connection_id: Optional[int]
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
-class OnuListResponse(BaseModel):
+class OnuListResponse(ORMModel):
     id: int
     mac_address: str
     serial_number: str
@@ -110,9 +96,6 @@ class OnuListResponse(BaseModel):
     connection_id: Optional[int]
     client_name: str = ""
 
-    class Config:
-        from_attributes = True
-
 
 # --- CPE ---
 class CpeCreate(BaseModel):
@@ -124,15 +107,12 @@ class CpeCreate(BaseModel):
     password_encrypted: Optional[str] = None
 
 
-class CpeUpdate(BaseModel):
+class CpeUpdate(ORMModel):
     is_active: Optional[bool] = None
     mac_wlan: Optional[str] = None
 
-    class Config:
-        from_attributes = True
-
 
-class CpeResponse(BaseModel):
+class CpeResponse(ORMModel):
     id: int
     model_id: Optional[int]
     mac_ether1: str
@@ -141,11 +121,8 @@ class CpeResponse(BaseModel):
     connection_id: Optional[int]
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
-class CpeListResponse(BaseModel):
+class CpeListResponse(ORMModel):
     id: int
     mac_ether1: str
     mac_wlan: Optional[str]
@@ -155,9 +132,6 @@ class CpeListResponse(BaseModel):
     connection_id: Optional[int]
     client_name: str = ""
 
-    class Config:
-        from_attributes = True
-
 
 # --- Router ---
 class RouterCreate(BaseModel):
@@ -168,7 +142,7 @@ class RouterCreate(BaseModel):
     password_encrypted: Optional[str] = None
 
 
-class RouterResponse(BaseModel):
+class RouterResponse(ORMModel):
     id: int
     model_id: Optional[int]
     mac_address: Optional[str]
@@ -176,6 +150,3 @@ class RouterResponse(BaseModel):
     is_active: bool
     connection_id: Optional[int]
     created_at: datetime
-
-    class Config:
-        from_attributes = True
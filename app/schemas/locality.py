@@ -4,6 +4,7 @@ NetKeeper - Schemas: Localidades
 from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
+from app.schemas.common import ORMModel
 
 
 class LocalityBase(BaseModel):
@@ -21,7 +22,7 @@ class LocalityCreate(LocalityBase):
     pass
 
 
-class LocalityUpdate(BaseModel):
+class LocalityUpdate(ORMModel):
     name: Optional[str] = None
     municipality: Optional[str] = None
     state: Optional[str] = None
@@ -31,15 +32,9 @@ class LocalityUpdate(BaseModel):
     is_active: Optional[bool] = None
     notes: Optional[str] = None
 
-    class Config:
-        from_attributes = True
 
-
-class LocalityResponse(LocalityBase):
+class LocalityResponse(LocalityBase, ORMModel):
     id: int
     tenant_id: int
     created_at: datetime
     updated_at: datetime
-
-    class Config:
-        from_attributes = True
\ No newline at end of file
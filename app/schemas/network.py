@@ -5,6 +5,7 @@ Cascada: Célula → Zona OLT → NAP → Puerto
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
+from app.schemas.common import ORMModel, TrustedFromORM
 
 
 # --- OLT Zone ---
@@ -20,7 +21,7 @@ class OltZoneUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 
-class OltZoneResponse(BaseModel):
+class OltZoneResponse(ORMModel):
     id: int
     cell_id: int
     name: str
@@ -28,9 +29,6 @@ class OltZoneResponse(BaseModel):
     is_active: bool
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 # --- NAP ---
 class NapCreate(BaseModel):
@@ -55,17 +53,14 @@ class NapUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 
-class NapPortResponse(BaseModel):
+class NapPortResponse(TrustedFromORM, ORMModel):
     id: int
     port_number: int
     is_occupied: bool
     connection_id: Optional[int]
 
-    class Config:
-        from_attributes = True
-
 
-class NapResponse(BaseModel):
+class NapResponse(ORMModel):
     id: int
     olt_zone_id: int
     name: str
@@ -78,43 +73,31 @@ class NapResponse(BaseModel):
     is_active: bool
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
-class NapDetailResponse(NapResponse):
+class NapDetailResponse(TrustedFromORM, NapResponse):
     ports: List[NapPortResponse] = []
     occupied_count: int = 0
     free_count: int = 0
 
 
 # --- Cascade responses (para dropdowns de conexión) ---
-class CascadeZoneResponse(BaseModel):
+class CascadeZoneResponse(ORMModel):
     """Para dropdown de Zonas OLT al crear conexión."""
     id: int
     name: str
     slot_port: Optional[str]
     nap_count: int = 0
 
-    class Config:
-        from_attributes = True
 
-
-class CascadeNapResponse(BaseModel):
+class CascadeNapResponse(ORMModel):
     """Para dropdown de NAPs al crear conexión."""
     id: int
     name: str
     total_ports: int
     free_ports: int = 0
 
-    class Config:
-        from_attributes = True
-
 
-class CascadeFreePortResponse(BaseModel):
+class CascadeFreePortResponse(ORMModel):
     """Para dropdown de puertos libres al crear conexión."""
     id: int
     port_number: int
-
-    class Config:
-        from_attributes = True
@@ -5,6 +5,7 @@ from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 from app.models.payment_gateway import GatewayType
+from app.schemas.common import ORMModel
 
 
 class GatewayConfigCreate(BaseModel):
@@ -29,7 +30,7 @@ class GatewayConfigUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 
-class GatewayConfigResponse(BaseModel):
+class GatewayConfigResponse(ORMModel):
     id: int
     gateway_type: GatewayType
     display_name: Optional[str]
@@ -39,9 +40,6 @@ class GatewayConfigResponse(BaseModel):
     is_default: bool
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 class CreateChargeRequest(BaseModel):
     """Crear un cobro genérico con la pasarela activa."""
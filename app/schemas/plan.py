@@ -5,6 +5,7 @@ from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 from app.models.plan import PlanType
+from app.schemas.common import ORMModel
 
 
 class ServicePlanBase(BaseModel):
@@ -37,7 +38,7 @@ class ServicePlanCreate(ServicePlanBase):
     cell_ids: Optional[List[int]] = []    # Células a asignar
 
 
-class ServicePlanUpdate(BaseModel):
+class ServicePlanUpdate(ORMModel):
     name: Optional[str] = None
     price: Optional[float] = None
     upload_speed: Optional[str] = None
@@ -45,22 +46,16 @@ class ServicePlanUpdate(BaseModel):
     is_active: Optional[bool] = None
     cell_ids: Optional[List[int]] = None
 
-    class Config:
-        from_attributes = True
 
-
-class ServicePlanResponse(ServicePlanBase):
+class ServicePlanResponse(ServicePlanBase, ORMModel):
     id: int
     tenant_id: int
     is_active: bool
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
-class ServicePlanListResponse(BaseModel):
+class ServicePlanListResponse(ORMModel):
     id: int
     name: str
     plan_type: PlanType
@@ -73,12 +68,9 @@ class ServicePlanListResponse(BaseModel):
     connection_count: int = 0
     cell_count: int = 0
 
-    class Config:
-        from_attributes = True
-
 
 # --- Cell Interface (ANTENAS) ---
-class CellInterfaceResponse(BaseModel):
+class CellInterfaceResponse(ORMModel):
     id: int
     cell_id: int
     interface_name: str
@@ -87,9 +79,6 @@ class CellInterfaceResponse(BaseModel):
     hosts: Optional[int]
     connections_allowed: bool
 
-    class Config:
-        from_attributes = True
-
 
 class CellInterfaceUpdate(BaseModel):
     connections_allowed: bool
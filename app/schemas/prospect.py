@@ -5,6 +5,7 @@ from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 from app.models.prospect import ProspectStatus, InstallationType
+from app.schemas.common import TrustedFromORM
 
 
 class ProspectBase(BaseModel):
@@ -38,7 +39,7 @@ class ProspectUpdate(BaseModel):
         from_attributes = True
 
 
-class ProspectResponse(ProspectBase):
+class ProspectResponse(TrustedFromORM, ProspectBase):
     id: int
     tenant_id: int
     status: ProspectStatus
@@ -56,7 +57,7 @@ class FollowUpCreate(BaseModel):
     note: str
 
 
-class FollowUpResponse(BaseModel):
+class FollowUpResponse(TrustedFromORM, BaseModel):
     id: int
     prospect_id: int
     user_id: Optional[int]
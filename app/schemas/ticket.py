@@ -39,6 +39,15 @@ class TicketAssign(BaseModel):
     assigned_to: int
 
 
+class TicketBulkClose(BaseModel):
+    ticket_ids: List[int] = Field(..., min_length=1, max_length=500)
+
+
+class TicketBulkCloseResponse(BaseModel):
+    closed: int
+    ticket_ids: List[int]
+
+
 class TicketNoteResponse(BaseModel):
     id: int
     note: str
@@ -102,6 +111,18 @@ class TicketListResponse(BaseModel):
         from_attributes = True
 
 
+class TicketCursor(BaseModel):
+    """Posición para pedir la siguiente página de tickets."""
+    created_at: datetime
+    id: int
+
+
+class TicketPageResponse(BaseModel):
+    """Página de tickets (keyset). next_cursor es None en la última página."""
+    tickets: List[TicketListResponse]
+    next_cursor: Optional[TicketCursor] = None
+
+
 # ── Nota ───────────────────────────────────────────────
 
 class TicketNoteCreate(BaseModel):
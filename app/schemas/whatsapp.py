@@ -38,6 +38,7 @@ class WhatsappConfigResponse(BaseModel):
 
     class Config:
         from_attributes = True
+        frozen = True
 
 
 # ================================================================
@@ -50,6 +51,10 @@ class SendMessageRequest(BaseModel):
     message_type: MessageType = MessageType.TEXT
 
 
+# Tope de mensajes por respuesta de conversación (paginados por before_id)
+MAX_MESSAGES_PAGE = 500
+
+
 class MessageResponse(BaseModel):
     id: int
     direction: MessageDirection
@@ -63,6 +68,7 @@ class MessageResponse(BaseModel):
 
     class Config:
         from_attributes = True
+        frozen = True
 
 
 # ================================================================
@@ -83,6 +89,7 @@ class ConversationListResponse(BaseModel):
 
     class Config:
         from_attributes = True
+        frozen = True
 
 
 class ConversationDetailResponse(BaseModel):
@@ -93,10 +100,11 @@ class ConversationDetailResponse(BaseModel):
     client_name: Optional[str] = None
     status: ConversationStatus
     unread_count: int
-    messages: List[MessageResponse]
+    messages: List[MessageResponse] = Field(default_factory=list, max_length=MAX_MESSAGES_PAGE)
 
     class Config:
         from_attributes = True
+        frozen = True
 
 
 class LinkClientRequest(BaseModel):
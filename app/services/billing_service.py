@@ -8,19 +8,27 @@ Recargo automático:
   - PREPAGO: No se genera recargo. Puede pagar cuando quiera.
   - Ambos tipos se suspenden si no pagan después de los días de gracia.
 """
+import asyncio
+import functools
 import logging
+import os
+import time
 import uuid
 from datetime import date, datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from calendar import monthrange
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select, insert, update, func, and_, case, cast, literal, String
+from sqlalchemy.orm import aliased
 
+from app.database import strict_loading
 from app.models.billing import (
     BillingGroup, TapipayConfig, Invoice, Payment,
     InvoiceStatus, InvoiceType, PaymentStatus, PaymentMethod
 )
+from app.models.cell import Cell
 from app.models.client import Client, ClientType
 from app.models.connection import Connection, ConnectionStatus
 from app.models.plan import ServicePlan
@@ -32,18 +40,38 @@ from app.services.mikrotik_helper import (
 
 logger = logging.getLogger("billing_service")
 
-MONTHS_ES = {
-    1: "Enero", 2: "Febrero", 3: "Marzo", 4: "Abril",
-    5: "Mayo", 6: "Junio", 7: "Julio", 8: "Agosto",
-    9: "Septiembre", 10: "Octubre", 11: "Noviembre", 12: "Diciembre"
-}
+# Indexado por número de mes (1-12); la posición 0 queda vacía
+MONTHS_ES = (
+    "", "Enero", "Febrero", "Marzo", "Abril",
+    "Mayo", "Junio", "Julio", "Agosto",
+    "Septiembre", "Octubre", "Noviembre", "Diciembre"
+)
 
 
+# Se llama por factura en la facturación masiva; los ids activos caben en el cache
+@functools.lru_cache(maxsize=16384)
 def generate_tapipay_identifier(client_id: int) -> str:
-    return f"CLI-{str(client_id).zfill(5)}"
+    return f"CLI-{client_id:05d}"
+
+
+# Servicio tapipay por tenant: la config casi nunca cambia y en la
+# facturación masiva se pide una y otra vez. Reutilizar la instancia
+# también conserva su accessToken (un login menos por llamada).
+# Se invalida al crear/actualizar la config; con varios workers un
+# cambio tarda como máximo TAPIPAY_SERVICE_TTL segundos en verse.
+TAPIPAY_SERVICE_TTL = 300
+_tapipay_cache: Dict[int, Tuple[float, TapipayService]] = {}
+
+
+def invalidate_tapipay_service(tenant_id: int) -> None:
+    _tapipay_cache.pop(tenant_id, None)
 
 
 async def get_tapipay_service(db: AsyncSession, tenant_id: int) -> TapipayService:
+    cached = _tapipay_cache.get(tenant_id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
     result = await db.execute(
         select(TapipayConfig).where(
             TapipayConfig.tenant_id == tenant_id,
@@ -54,7 +82,7 @@ async def get_tapipay_service(db: AsyncSession, tenant_id: int) -> TapipayServic
     if not config:
         raise TapipayError("No hay configuración de tapipay. Configúrela primero.")
 
-    return TapipayService(
+    service = TapipayService(
         api_key=config.api_key,
         username=config.username,
         password=config.password,
@@ -66,12 +94,46 @@ async def get_tapipay_service(db: AsyncSession, tenant_id: int) -> TapipayServic
         identifier_name_digital=config.identifier_name_digital or "",
         identifier_name_cash=config.identifier_name_cash or "",
     )
+    _tapipay_cache[tenant_id] = (time.monotonic() + TAPIPAY_SERVICE_TTL, service)
+    return service
 
 
 # ================================================================
 # GENERAR FACTURAS MENSUALES
 # ================================================================
 
+# Llamadas simultáneas a tapipay durante la facturación de un grupo
+TAPIPAY_SYNC_CONCURRENCY = 16
+
+
+async def _sync_invoice_debt(tapipay, sem, invoice, client, plan, due_date, period_label):
+    """
+    Registra la deuda en tapipay y guarda tx/referencia en el dict de la
+    factura (ya insertada: invoice["id"] es la clave del UPDATE posterior).
+    """
+    async with sem:
+        tp_result = await tapipay.create_debt(
+            identifier_value=client.tapipay_identifier,
+            amount=plan.price,
+            client_name=f"{client.first_name} {client.last_name}",
+            client_email=client.email or "noemail@sistema.local",
+            client_phone=client.phone_cell or "+520000000000",
+            expiration_date=due_date.isoformat(),
+            concept=f"Internet {period_label}",
+            product=plan.name,
+            external_request_id=invoice["tapipay_external_request_id"],
+        )
+    invoice["tapipay_synced"] = True
+    invoice["tapipay_tx"] = tp_result.get("tx")
+    invoice["tapipay_main_tx"] = tp_result.get("main_tx")
+    refs = tp_result.get("references", [])
+    for ref in refs:
+        if ref.get("status") == "success":
+            invoice["tapipay_reference_value"] = ref.get("value")
+            invoice["tapipay_reference_image_url"] = ref.get("imageUrl")
+            break
+
+
 async def generate_invoices_for_group(
     db: AsyncSession, tenant_id: int, billing_group_id: int,
     period_month: int, period_year: int, sync_tapipay: bool = True
@@ -81,7 +143,7 @@ async def generate_invoices_for_group(
     if not group or group.tenant_id != tenant_id:
         raise ValueError("Grupo de corte no encontrado")
 
-    period_label = f"{MONTHS_ES.get(period_month, '')} {period_year}"
+    period_label = f"{MONTHS_ES[period_month]} {period_year}"
 
     # Clientes activos del grupo con conexiones activas
     result = await db.execute(
@@ -123,21 +185,32 @@ async def generate_invoices_for_group(
             errors.append(f"tapipay no disponible: {e}")
             sync_tapipay = False
 
-    for client, connection, plan in rows:
+    # Facturas del periodo que ya existen, en una sola consulta para todo
+    # el grupo (antes era un SELECT por cliente dentro del ciclo)
+    existing_result = await db.execute(
+        select(Invoice.client_id, Invoice.connection_id).where(
+            Invoice.tenant_id == tenant_id,
+            Invoice.client_id.in_({client.id for client, _, _ in rows}),
+            Invoice.period_month == period_month,
+            Invoice.period_year == period_year,
+            Invoice.invoice_type == InvoiceType.MONTHLY,
+            Invoice.is_active == True
+        )
+    )
+    already_billed = set(existing_result.all())
+
+    # externalRequestId de tapipay: un solo os.urandom para todo el grupo
+    # en vez de uno por uuid4(); se conserva el formato UUID v4 que ya
+    # tienen las facturas existentes
+    rand = os.urandom(16 * len(rows))
+
+    # Facturas nuevas como dicts: se insertan todas juntas al final
+    invoice_payloads = []
+    to_sync = []
+    for i, (client, connection, plan) in enumerate(rows):
         try:
             # No duplicar facturas
-            existing = await db.execute(
-                select(Invoice).where(
-                    Invoice.tenant_id == tenant_id,
-                    Invoice.client_id == client.id,
-                    Invoice.connection_id == connection.id,
-                    Invoice.period_month == period_month,
-                    Invoice.period_year == period_year,
-                    Invoice.invoice_type == InvoiceType.MONTHLY,
-                    Invoice.is_active == True
-                )
-            )
-            if existing.scalar_one_or_none():
+            if (client.id, connection.id) in already_billed:
                 errors.append(f"Cliente {client.id}: ya tiene factura de {period_label}")
                 continue
 
@@ -148,53 +221,88 @@ async def generate_invoices_for_group(
                 client.payment_link = tapipay.get_payment_link(client.tapipay_identifier)
 
             # Crear factura
-            ext_req_id = str(uuid.uuid4())
-            invoice = Invoice(
-                tenant_id=tenant_id, client_id=client.id,
-                connection_id=connection.id, billing_group_id=billing_group_id,
-                invoice_type=InvoiceType.MONTHLY,
-                period_month=period_month, period_year=period_year,
-                period_label=period_label, amount=plan.price, amount_paid=0.0,
-                currency="MXN", status=InvoiceStatus.PENDING,
-                due_date=due_date, suspension_date=suspension_date,
-                tapipay_external_request_id=ext_req_id,
-                payment_link=client.payment_link,
-            )
-            db.add(invoice)
-            await db.flush()
-            created += 1
-
-            # Sincronizar con tapipay
-            if sync_tapipay and tapipay:
-                try:
-                    tp_result = await tapipay.create_debt(
-                        identifier_value=client.tapipay_identifier,
-                        amount=plan.price,
-                        client_name=f"{client.first_name} {client.last_name}",
-                        client_email=client.email or "noemail@sistema.local",
-                        client_phone=client.phone_cell or "+520000000000",
-                        expiration_date=due_date.isoformat(),
-                        concept=f"Internet {period_label}",
-                        product=plan.name,
-                        external_request_id=ext_req_id,
-                    )
-                    invoice.tapipay_synced = True
-                    invoice.tapipay_tx = tp_result.get("tx")
-                    invoice.tapipay_main_tx = tp_result.get("main_tx")
-                    refs = tp_result.get("references", [])
-                    for ref in refs:
-                        if ref.get("status") == "success":
-                            invoice.tapipay_reference_value = ref.get("value")
-                            invoice.tapipay_reference_image_url = ref.get("imageUrl")
-                            break
-                    synced += 1
-                except TapipayError as e:
-                    errors.append(f"Cliente {client.id} tapipay: {e}")
+            invoice = {
+                "tenant_id": tenant_id,
+                "client_id": client.id,
+                "connection_id": connection.id,
+                "billing_group_id": billing_group_id,
+                "invoice_type": InvoiceType.MONTHLY,
+                "period_month": period_month,
+                "period_year": period_year,
+                "period_label": period_label,
+                "amount": plan.price,
+                "amount_paid": 0.0,
+                "currency": "MXN",
+                "status": InvoiceStatus.PENDING,
+                "due_date": due_date,
+                "suspension_date": suspension_date,
+                "tapipay_external_request_id": str(
+                    uuid.UUID(bytes=rand[i * 16:(i + 1) * 16], version=4)
+                ),
+                "payment_link": client.payment_link,
+                "tapipay_synced": False,
+                "tapipay_tx": None,
+                "tapipay_main_tx": None,
+                "tapipay_reference_value": None,
+                "tapipay_reference_image_url": None,
+            }
+            invoice_payloads.append(invoice)
+            to_sync.append((invoice, client, plan))
 
         except Exception as e:
             errors.append(f"Error cliente {client.id}: {str(e)}")
 
+    # Un solo INSERT multi-fila para todo el grupo, confirmado antes de
+    # tocar tapipay: si algo falla después, las deudas remotas ya tienen
+    # su factura local y un reintento no las duplica
+    if invoice_payloads:
+        inserted = await db.execute(
+            insert(Invoice).returning(Invoice.id, Invoice.tapipay_external_request_id),
+            invoice_payloads
+        )
+        ids_by_request = {request_id: invoice_id for invoice_id, request_id in inserted.all()}
+        for invoice in invoice_payloads:
+            invoice["id"] = ids_by_request[invoice["tapipay_external_request_id"]]
+        created = len(invoice_payloads)
     await db.commit()
+
+    # Sincronizar con tapipay: las llamadas son independientes, van en
+    # paralelo (acotadas) y tx/referencia se guardan con un solo UPDATE
+    if sync_tapipay and tapipay and to_sync:
+        try:
+            await tapipay.ensure_token()  # un solo login antes de lanzar las llamadas
+        except TapipayError as e:
+            errors.append(f"tapipay no disponible: {e}")
+            to_sync = []
+        sem = asyncio.Semaphore(TAPIPAY_SYNC_CONCURRENCY)
+        outcomes = await asyncio.gather(
+            *(_sync_invoice_debt(tapipay, sem, invoice, client, plan, due_date, period_label)
+              for invoice, client, plan in to_sync),
+            return_exceptions=True
+        )
+        for (invoice, client, plan), outcome in zip(to_sync, outcomes):
+            if isinstance(outcome, TapipayError):
+                errors.append(f"Cliente {client.id} tapipay: {outcome}")
+            elif isinstance(outcome, Exception):
+                errors.append(f"Error cliente {client.id}: {str(outcome)}")
+            else:
+                synced += 1
+
+        synced_rows = [
+            {
+                "id": invoice["id"],
+                "tapipay_synced": True,
+                "tapipay_tx": invoice["tapipay_tx"],
+                "tapipay_main_tx": invoice["tapipay_main_tx"],
+                "tapipay_reference_value": invoice["tapipay_reference_value"],
+                "tapipay_reference_image_url": invoice["tapipay_reference_image_url"],
+            }
+            for invoice, _, _ in to_sync if invoice["tapipay_synced"]
+        ]
+        if synced_rows:
+            await db.execute(update(Invoice), synced_rows)
+            await db.commit()
+
     logger.info(f"Facturación {period_label} '{group.name}': {created} facturas, {synced} tapipay")
     return {"billing_group": group.name, "period": period_label,
             "invoices_created": created, "invoices_synced_tapipay": synced, "errors": errors}
@@ -220,81 +328,102 @@ async def generate_late_fees(
     if not ref_date:
         ref_date = date.today()
 
-    # Facturas mensuales pendientes cuyo día de corte ya pasó
-    result = await db.execute(
-        select(Invoice, Client, BillingGroup)
+    # Todo se resuelve en la BD (conjuntos, sin traer filas a Python):
+    #   1. UPDATE ... RETURNING: pasa a OVERDUE una factura fuente por
+    #      (cliente, mes, año) sin recargo previo → ids de las fuentes
+    #   2. INSERT ... SELECT: un recargo por cada fuente
+    # El UPDATE va primero porque, tras el INSERT, el NOT EXISTS ya no
+    # encontraría las fuentes.
+    overdue_monthly = and_(
+        Invoice.tenant_id == tenant_id,
+        Invoice.invoice_type == InvoiceType.MONTHLY,
+        Invoice.status == InvoiceStatus.PENDING,
+        Invoice.due_date < ref_date,         # Ya pasó el día de corte
+        Invoice.is_active == True,
+    )
+
+    # PREPAGO: no se cobra recargo (solo se cuentan)
+    skipped_prepago = await db.scalar(
+        select(func.count(Invoice.id))
+        .join(Client, Invoice.client_id == Client.id)
+        .join(BillingGroup, Invoice.billing_group_id == BillingGroup.id)
+        .where(overdue_monthly, Client.client_type == ClientType.PREPAGO)
+    )
+
+    late_fee = aliased(Invoice)
+    source_ids = (
+        select(func.min(Invoice.id))
         .join(Client, Invoice.client_id == Client.id)
         .join(BillingGroup, Invoice.billing_group_id == BillingGroup.id)
         .where(
-            Invoice.tenant_id == tenant_id,
-            Invoice.invoice_type == InvoiceType.MONTHLY,
-            Invoice.status == InvoiceStatus.PENDING,
-            Invoice.due_date < ref_date,         # Ya pasó el día de corte
-            Invoice.is_active == True,
+            overdue_monthly,
+            Client.client_type != ClientType.PREPAGO,
+            # No duplicar: un recargo por cliente/periodo
+            ~select(late_fee.id).where(
+                late_fee.tenant_id == tenant_id,
+                late_fee.client_id == Invoice.client_id,
+                late_fee.period_month == Invoice.period_month,
+                late_fee.period_year == Invoice.period_year,
+                late_fee.invoice_type == InvoiceType.LATE_FEE,
+                late_fee.is_active == True,
+            ).exists(),
         )
+        .group_by(Invoice.client_id, Invoice.period_month, Invoice.period_year)
     )
-    rows = result.all()
 
     fees_generated = 0
-    skipped_prepago = 0
     errors = []
+    try:
+        # La factura original pasa a OVERDUE
+        result = await db.execute(
+            update(Invoice)
+            .where(Invoice.id.in_(source_ids))
+            .values(status=InvoiceStatus.OVERDUE)
+            .returning(Invoice.id)
+            .execution_options(synchronize_session=False)
+        )
+        overdue_ids = result.scalars().all()
 
-    for invoice, client, group in rows:
-        try:
-            # PREPAGO: no se cobra recargo
-            if client.client_type == ClientType.PREPAGO:
-                skipped_prepago += 1
-                continue
-
-            # Verificar que no exista ya un recargo para esta factura/periodo
-            existing_fee = await db.execute(
-                select(Invoice).where(
-                    Invoice.tenant_id == tenant_id,
-                    Invoice.client_id == client.id,
-                    Invoice.period_month == invoice.period_month,
-                    Invoice.period_year == invoice.period_year,
-                    Invoice.invoice_type == InvoiceType.LATE_FEE,
-                    Invoice.is_active == True
-                )
+        if overdue_ids:
+            month_name = case(
+                {month: name for month, name in enumerate(MONTHS_ES) if month},
+                value=Invoice.period_month
             )
-            if existing_fee.scalar_one_or_none():
-                continue  # Ya tiene recargo, no duplicar
-
-            # Crear factura de recargo
-            fee_amount = group.reconnection_fee  # $50 por default
-            period_label = f"Recargo {MONTHS_ES.get(invoice.period_month, '')} {invoice.period_year}"
-
-            late_fee = Invoice(
-                tenant_id=tenant_id,
-                client_id=client.id,
-                connection_id=invoice.connection_id,
-                billing_group_id=group.id,
-                invoice_type=InvoiceType.LATE_FEE,
-                period_month=invoice.period_month,
-                period_year=invoice.period_year,
-                period_label=period_label,
-                amount=fee_amount,
-                amount_paid=0.0,
-                currency="MXN",
-                status=InvoiceStatus.PENDING,
-                due_date=ref_date,  # Vence hoy mismo
-                suspension_date=invoice.suspension_date,  # Misma fecha de suspensión
-                payment_link=client.payment_link,
-                notes=f"Recargo automático por no pagar a tiempo (${fee_amount})",
+            fee_text = cast(BillingGroup.reconnection_fee, String)
+            fee_rows = (
+                select(
+                    literal(tenant_id), Invoice.client_id, Invoice.connection_id,
+                    BillingGroup.id,
+                    literal(InvoiceType.LATE_FEE, Invoice.invoice_type.type),
+                    Invoice.period_month, Invoice.period_year,
+                    literal("Recargo ") + month_name + " " + cast(Invoice.period_year, String),
+                    BillingGroup.reconnection_fee,  # $50 por default
+                    literal(0.0), literal("MXN"),
+                    literal(InvoiceStatus.PENDING, Invoice.status.type),
+                    literal(ref_date, Invoice.due_date.type),  # Vence hoy mismo
+                    Invoice.suspension_date,  # Misma fecha de suspensión
+                    Client.payment_link,
+                    literal("Recargo automático por no pagar a tiempo ($") + fee_text + ")",
+                )
+                .join(Client, Invoice.client_id == Client.id)
+                .join(BillingGroup, Invoice.billing_group_id == BillingGroup.id)
+                .where(Invoice.id.in_(overdue_ids))
             )
-            db.add(late_fee)
-            fees_generated += 1
-
-            # Marcar la factura original como OVERDUE
-            invoice.status = InvoiceStatus.OVERDUE
-
-            logger.info(
-                f"Recargo ${fee_amount} generado: {client.first_name} {client.last_name} "
-                f"(cliente {client.id}) - {period_label}"
+            result = await db.execute(
+                insert(Invoice).from_select(
+                    [
+                        "tenant_id", "client_id", "connection_id", "billing_group_id",
+                        "invoice_type", "period_month", "period_year", "period_label",
+                        "amount", "amount_paid", "currency", "status", "due_date",
+                        "suspension_date", "payment_link", "notes",
+                    ],
+                    fee_rows
+                )
             )
-
-        except Exception as e:
-            errors.append(f"Error cliente {client.id}: {str(e)}")
+            fees_generated = result.rowcount
+    except Exception as e:
+        await db.rollback()
+        errors.append(f"Error guardando recargos: {str(e)}")
 
     await db.commit()
 
@@ -375,20 +504,42 @@ async def _process_confirmed(db, ext_client_id, amount, operation_id, raw_data):
         paid_at=datetime.utcnow(), is_manual=False,
     )
     db.add(payment)
+    # Si otra entrega del mismo operationId se procesa a la vez, el índice
+    # único uq_payments_tapipay_operation_id frena este INSERT: no se abona dos veces
+    try:
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        return {"status": "ignored", "reason": "duplicate"}
 
-    # Actualizar factura
-    invoice.amount_paid = (invoice.amount_paid or 0) + amount
-    invoice.status = InvoiceStatus.PAID if invoice.amount_paid >= invoice.amount else InvoiceStatus.PARTIAL
+    # Actualizar factura: un solo UPDATE con el estado calculado por CASE
+    # sobre el valor en la BD (dos webhooks simultáneos no pisan el abono
+    # del otro)
+    paid = Invoice.amount_paid + amount
+    result = await db.execute(
+        update(Invoice)
+        .where(Invoice.id == invoice.id)
+        .values(
+            amount_paid=paid,
+            status=case(
+                (paid >= Invoice.amount, literal(InvoiceStatus.PAID, Invoice.status.type)),
+                else_=literal(InvoiceStatus.PARTIAL, Invoice.status.type)
+            ),
+        )
+        .returning(Invoice.status)
+        .execution_options(synchronize_session=False)
+    )
+    invoice_status = result.scalar_one()
 
     # REACTIVAR si pagó completo
     mk_result = None
-    if invoice.status == InvoiceStatus.PAID:
+    if invoice_status == InvoiceStatus.PAID:
         mk_result = await _reactivate_if_suspended(db, client)
 
     await db.commit()
-    logger.info(f"Pago: cliente {client.id}, factura {invoice.id}, ${amount}, {invoice.status.value}")
+    logger.info(f"Pago: cliente {client.id}, factura {invoice.id}, ${amount}, {invoice_status.value}")
     return {"status": "processed", "client_id": client.id, "invoice_id": invoice.id,
-            "invoice_status": invoice.status.value, "reactivated": mk_result is not None}
+            "invoice_status": invoice_status.value, "reactivated": mk_result is not None}
 
 
 async def _process_reversed(db, operation_id, amount):
@@ -403,7 +554,7 @@ async def _process_reversed(db, operation_id, amount):
     payment.status = PaymentStatus.REVERSED
     invoice = await db.get(Invoice, payment.invoice_id)
     if invoice:
-        invoice.amount_paid = max(0, (invoice.amount_paid or 0) - amount)
+        invoice.amount_paid = max(0, invoice.amount_paid - amount)
         if invoice.amount_paid < invoice.amount:
             invoice.status = InvoiceStatus.PENDING
     await db.commit()
@@ -418,27 +569,49 @@ async def _reactivate_if_suspended(db, client):
             Connection.status == ConnectionStatus.SUSPENDED,
             Connection.is_active == True
         )
+        .options(*strict_loading())
     )
     connections = result.scalars().all()
     if not connections:
         return None
 
+    # Células precargadas: las reactivaciones no tocan la BD y pueden
+    # ir en paralelo sobre la misma sesión
+    cells_by_id = await _load_cells(db, {conn.cell_id for conn in connections})
+    mk_cache = {}
+    raw = await asyncio.gather(
+        *(reactivate_connection_mikrotik(db, conn, cache=mk_cache, preloaded=cells_by_id)
+          for conn in connections),
+        return_exceptions=True
+    )
+
     results = []
-    for conn in connections:
-        try:
-            mk = await reactivate_connection_mikrotik(db, conn)
-            conn.status = ConnectionStatus.ACTIVE
-            results.append({"connection_id": conn.id, "mikrotik": mk})
-            logger.info(f"Auto-reactivado: cliente {client.id}, conexión {conn.id}")
-        except Exception as e:
-            results.append({"connection_id": conn.id, "error": str(e)})
+    for conn, mk in zip(connections, raw):
+        if isinstance(mk, Exception):
+            results.append({"connection_id": conn.id, "error": str(mk)})
+            continue
+        conn.status = ConnectionStatus.ACTIVE
+        results.append({"connection_id": conn.id, "mikrotik": mk})
+        logger.info(f"Auto-reactivado: cliente {client.id}, conexión {conn.id}")
     return results
 
 
+async def _load_cells(db, cell_ids) -> Dict[int, Cell]:
+    """Células indicadas por id, en una sola consulta."""
+    if not cell_ids:
+        return {}
+    result = await db.execute(select(Cell).where(Cell.id.in_(cell_ids)))
+    return {cell.id: cell for cell in result.scalars()}
+
+
 # ================================================================
 # SUSPENDER MOROSOS (AMBOS TIPOS)
 # ================================================================
 
+# Filas por lote al recorrer las facturas vencidas en suspend_overdue_clients
+SUSPEND_BATCH_SIZE = 500
+
+
 async def suspend_overdue_clients(db: AsyncSession, tenant_id: int, ref_date: Optional[date] = None):
     """
     Suspende clientes con facturas vencidas (ejecutar diario).
@@ -447,7 +620,29 @@ async def suspend_overdue_clients(db: AsyncSession, tenant_id: int, ref_date: Op
     if not ref_date:
         ref_date = date.today()
 
-    result = await db.execute(
+    count = 0
+    errors = []
+    cells_by_id: Dict[int, Cell] = {}
+    mk_cache = {}  # un MikroTikService por célula para todo el barrido
+
+    async def suspend_cell(cell_rows):
+        nonlocal count
+        for invoice, connection, client in cell_rows:
+            try:
+                await suspend_connection_mikrotik(
+                    db, connection, cache=mk_cache, preloaded=cells_by_id
+                )
+                connection.status = ConnectionStatus.SUSPENDED
+                invoice.status = InvoiceStatus.SUSPENDED
+                count += 1
+                logger.info(f"Suspendido: {client.first_name} {client.last_name} ({client.client_type.value})")
+            except Exception as e:
+                errors.append(f"Cliente {client.id}: {e}")
+
+    # En streaming por lotes: con miles de conexiones vencidas no se
+    # materializa todo el resultado; cada lote se escribe con flush y sus
+    # objetos ya limpios pueden liberarse antes de leer el siguiente
+    result = await db.stream(
         select(Invoice, Connection, Client)
         .join(Connection, Invoice.connection_id == Connection.id)
         .join(Client, Invoice.client_id == Client.id)
@@ -459,20 +654,22 @@ async def suspend_overdue_clients(db: AsyncSession, tenant_id: int, ref_date: Op
             Connection.status == ConnectionStatus.ACTIVE,
             Connection.is_active == True
         )
+        # Los helpers de MikroTik solo leen columnas (cell_id, ip, pppoe);
+        # la célula llega precargada. Nada de lazy loads en las tareas
+        .options(*strict_loading())
+        .execution_options(yield_per=SUSPEND_BATCH_SIZE)
     )
-    rows = result.all()
-
-    count = 0
-    errors = []
-    for invoice, connection, client in rows:
-        try:
-            await suspend_connection_mikrotik(db, connection)
-            connection.status = ConnectionStatus.SUSPENDED
-            invoice.status = InvoiceStatus.SUSPENDED
-            count += 1
-            logger.info(f"Suspendido: {client.first_name} {client.last_name} ({client.client_type.value})")
-        except Exception as e:
-            errors.append(f"Cliente {client.id}: {e}")
+    async for rows in result.partitions():
+        # Una tarea por célula: las conexiones de un mismo MikroTik se
+        # suspenden en orden, las de células distintas en paralelo.
+        # Las células se precargan: las tareas no tocan la BD
+        by_cell: Dict[int, list] = {}
+        for row in rows:
+            by_cell.setdefault(row[1].cell_id, []).append(row)
+        cells_by_id.update(await _load_cells(db, by_cell.keys() - cells_by_id.keys()))
+
+        await asyncio.gather(*(suspend_cell(cell_rows) for cell_rows in by_cell.values()))
+        await db.flush()
 
     await db.commit()
     return {"date": ref_date.isoformat(), "suspended": count, "errors": errors}
@@ -483,37 +680,48 @@ async def suspend_overdue_clients(db: AsyncSession, tenant_id: int, ref_date: Op
 # ================================================================
 
 async def get_client_billing_info(db: AsyncSession, client_id: int, tenant_id: int):
-    client = await db.get(Client, client_id)
-    if not client or client.tenant_id != tenant_id:
-        return {"error": "Cliente no encontrado"}
-
-    group_name, cutoff_day = None, None
-    if client.billing_group_id:
-        group = await db.get(BillingGroup, client.billing_group_id)
-        if group:
-            group_name, cutoff_day = group.name, group.cutoff_day
-
-    result = await db.execute(
-        select(func.count(Invoice.id), func.coalesce(func.sum(Invoice.amount - Invoice.amount_paid), 0))
-        .where(Invoice.client_id == client_id,
-               Invoice.status.in_([InvoiceStatus.PENDING, InvoiceStatus.OVERDUE,
-                                   InvoiceStatus.PARTIAL, InvoiceStatus.SUSPENDED]),
-               Invoice.is_active == True)
+    # Todo en una sola consulta: grupo por outer join, adeudo y último
+    # pago como subconsultas escalares (antes eran hasta cuatro)
+    open_invoices = and_(
+        Invoice.client_id == Client.id,
+        Invoice.status.in_([InvoiceStatus.PENDING, InvoiceStatus.OVERDUE,
+                            InvoiceStatus.PARTIAL, InvoiceStatus.SUSPENDED]),
+        Invoice.is_active == True
     )
-    row = result.one()
-
-    result2 = await db.execute(
+    pending_invoices = (
+        select(func.count(Invoice.id)).where(open_invoices).scalar_subquery()
+    )
+    total_debt = (
+        select(func.coalesce(func.sum(Invoice.amount - Invoice.amount_paid), 0))
+        .where(open_invoices).scalar_subquery()
+    )
+    last_payment = (
         select(Payment.paid_at).where(
-            Payment.client_id == client_id, Payment.status == PaymentStatus.CONFIRMED
-        ).order_by(Payment.paid_at.desc()).limit(1)
+            Payment.client_id == Client.id, Payment.status == PaymentStatus.CONFIRMED
+        ).order_by(Payment.paid_at.desc()).limit(1).scalar_subquery()
     )
+    result = await db.execute(
+        select(
+            Client.id, Client.first_name, Client.last_name,
+            Client.tapipay_identifier, Client.payment_link,
+            BillingGroup.name.label("group_name"), BillingGroup.cutoff_day,
+            pending_invoices.label("pending_invoices"),
+            total_debt.label("total_debt"),
+            last_payment.label("last_payment_date"),
+        )
+        .outerjoin(BillingGroup, BillingGroup.id == Client.billing_group_id)
+        .where(Client.id == client_id, Client.tenant_id == tenant_id)
+    )
+    row = result.one_or_none()
+    if not row:
+        return {"error": "Cliente no encontrado"}
 
     return {
-        "client_id": client.id,
-        "client_name": f"{client.first_name} {client.last_name}",
-        "tapipay_identifier": client.tapipay_identifier,
-        "payment_link": client.payment_link,
-        "billing_group": group_name, "cutoff_day": cutoff_day,
-        "pending_invoices": row[0], "total_debt": float(row[1]),
-        "last_payment_date": result2.scalar_one_or_none(),
-    }
\ No newline at end of file
+        "client_id": row.id,
+        "client_name": f"{row.first_name} {row.last_name}",
+        "tapipay_identifier": row.tapipay_identifier,
+        "payment_link": row.payment_link,
+        "billing_group": row.group_name, "cutoff_day": row.cutoff_day,
+        "pending_invoices": row.pending_invoices, "total_debt": float(row.total_debt),
+        "last_payment_date": row.last_payment_date,
+    }
@@ -4,6 +4,8 @@ Funciones auxiliares para crear instancias del servicio MikroTik
 a partir de los datos de células en la base de datos.
 """
 import logging
+from typing import Dict, Optional
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
@@ -13,7 +15,10 @@ from app.services.mikrotik_service import MikroTikService, MikroTikError
 logger = logging.getLogger("mikrotik_helper")
 
 
-async def get_mikrotik_for_cell(db: AsyncSession, cell_id: int, tenant_id: int) -> MikroTikService:
+async def get_mikrotik_for_cell(
+    db: AsyncSession, cell_id: int, tenant_id: int, *,
+    cache: Optional[dict] = None, preloaded: Optional[Dict[int, Cell]] = None
+) -> MikroTikService:
     """
     Obtiene una instancia de MikroTikService configurada
     con las credenciales del MikroTik asociado a una célula.
@@ -22,6 +27,11 @@ async def get_mikrotik_for_cell(db: AsyncSession, cell_id: int, tenant_id: int)
         db: Sesión de base de datos
         cell_id: ID de la célula
         tenant_id: ID del tenant
+        cache: Dict opcional (cell_id, tenant_id) -> MikroTikService que vive
+            lo que dura un proceso por lotes; evita releer la célula y
+            reconstruir el servicio por cada conexión de la misma célula
+        preloaded: Células ya cargadas por id (una consulta para todo el
+            lote); si se pasa, no se consulta la BD
     
     Returns:
         MikroTikService configurado y listo para usar
@@ -29,7 +39,15 @@ async def get_mikrotik_for_cell(db: AsyncSession, cell_id: int, tenant_id: int)
     Raises:
         MikroTikError: Si la célula no tiene MikroTik configurado
     """
-    cell = await db.get(Cell, cell_id)
+    if cache is not None:
+        mk = cache.get((cell_id, tenant_id))
+        if mk is not None:
+            return mk
+
+    if preloaded is not None:
+        cell = preloaded.get(cell_id)
+    else:
+        cell = await db.get(Cell, cell_id)
     if not cell or cell.tenant_id != tenant_id:
         raise MikroTikError("Célula no encontrada")
 
@@ -39,12 +57,15 @@ async def get_mikrotik_for_cell(db: AsyncSession, cell_id: int, tenant_id: int)
             f"Configure host, puerto y credenciales en la célula."
         )
 
-    return MikroTikService(
+    mk = MikroTikService(
         host=cell.mikrotik_host,
         port=cell.mikrotik_api_port or 8728,
         username=cell.mikrotik_username_encrypted or "admin",
         password=cell.mikrotik_password_encrypted or ""
     )
+    if cache is not None:
+        cache[(cell_id, tenant_id)] = mk
+    return mk
 
 
 async def provision_fiber_from_connection(db: AsyncSession, connection, plan) -> dict:
@@ -147,10 +168,16 @@ async def deprovision_connection(db: AsyncSession, connection) -> dict:
         return {"mikrotik_status": "error", "error": str(e)}
 
 
-async def suspend_connection_mikrotik(db: AsyncSession, connection) -> dict:
+async def suspend_connection_mikrotik(
+    db: AsyncSession, connection, *,
+    cache: Optional[dict] = None, preloaded: Optional[Dict[int, Cell]] = None
+) -> dict:
     """Suspende una conexión en el MikroTik."""
     try:
-        mk = await get_mikrotik_for_cell(db, connection.cell_id, connection.tenant_id)
+        mk = await get_mikrotik_for_cell(
+            db, connection.cell_id, connection.tenant_id,
+            cache=cache, preloaded=preloaded
+        )
 
         result = await mk.suspend_client(
             pppoe_username=connection.pppoe_username,
@@ -166,10 +193,16 @@ async def suspend_connection_mikrotik(db: AsyncSession, connection) -> dict:
         return {"mikrotik_status": "error", "error": str(e)}
 
 
-async def reactivate_connection_mikrotik(db: AsyncSession, connection) -> dict:
+async def reactivate_connection_mikrotik(
+    db: AsyncSession, connection, *,
+    cache: Optional[dict] = None, preloaded: Optional[Dict[int, Cell]] = None
+) -> dict:
     """Reactiva una conexión suspendida en el MikroTik."""
     try:
-        mk = await get_mikrotik_for_cell(db, connection.cell_id, connection.tenant_id)
+        mk = await get_mikrotik_for_cell(
+            db, connection.cell_id, connection.tenant_id,
+            cache=cache, preloaded=preloaded
+        )
 
         result = await mk.reactivate_client(
             pppoe_username=connection.pppoe_username,
@@ -4,13 +4,20 @@ Conecta al MikroTik vía API nativa (puerto 8728).
 Gestiona PPPoE Secrets, Simple Queues, Address Lists, Firewall.
 
 Usa librouteros para comunicación con RouterOS.
-Todas las operaciones son async vía asyncio.to_thread().
+Todas las operaciones son async: las llamadas bloqueantes corren en un
+ThreadPoolExecutor propio del módulo (_MT_EXECUTOR).
+Las sesiones autenticadas se reusan entre llamadas (pool por router).
 
 Instalación: pip install librouteros --break-system-packages
 """
 import asyncio
 import logging
-from typing import Optional, List, Dict, Any
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Optional, List, Dict, Any, Tuple, Callable, Awaitable
 from dataclasses import dataclass
 
 import librouteros
@@ -20,6 +27,7 @@ from librouteros.exceptions import (
     ConnectionClosed,
     FatalError
 )
+from librouteros.query import Key
 
 logger = logging.getLogger("mikrotik_service")
 
@@ -38,6 +46,110 @@ class MikroTikError(Exception):
     pass
 
 
+# Threads para librouteros (bloqueante), vivos todo el proceso. run_in_executor
+# directo evita el copy_context + partial que agrega asyncio.to_thread por
+# llamada; el código que corre acá no lee contextvars.
+_MT_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="mikrotik")
+
+
+def _run_blocking(fn, *args) -> Awaitable:
+    return asyncio.get_running_loop().run_in_executor(_MT_EXECUTOR, fn, *args)
+
+
+# Nombres de las Simple Queues que crea el sistema, según tipo de conexión
+def _fiber_queue_name(pppoe_username: str) -> str:
+    return f"queue_{pppoe_username}"
+
+
+def _antenna_queue_name(ip_address: str) -> str:
+    return f"queue_{ip_address.replace('.', '_')}"
+
+
+def _dhcp_queue_name(ip_address: str) -> str:
+    return f"queue_dhcp_{ip_address.replace('.', '_')}"
+
+
+# Segundos sin uso tras los cuales una sesión del pool se cierra
+MIKROTIK_POOL_IDLE = 60
+
+# Detección de routers caídos en sesiones persistentes: keepalive a los 30s
+# ociosos y, en Linux, abortar si un envío queda 20s sin ACK
+MIKROTIK_KEEPALIVE_IDLE = 30
+MIKROTIK_USER_TIMEOUT_MS = 20000
+
+
+class _PooledConn:
+    """
+    Sesión API persistente contra un router. librouteros no es thread-safe:
+    el lock garantiza un solo comando en vuelo por socket.
+    """
+    __slots__ = ("api", "lock", "last_used")
+
+    def __init__(self):
+        self.api = None
+        self.lock = asyncio.Lock()
+        self.last_used = 0.0
+
+    def discard(self):
+        if self.api is not None:
+            try:
+                self.api.close()
+            except Exception:
+                pass
+            self.api = None
+
+
+# (host, puerto, usuario, password) → sesión. La password va en la clave para
+# que credenciales cambiadas o erróneas no reusen un login ajeno. El event
+# loop es single-thread: setdefault alcanza para no duplicar entradas.
+_POOL: Dict[Tuple[str, int, str, str], _PooledConn] = {}
+
+
+def _reap_idle(now: float):
+    """Cierra las sesiones ociosas que nadie está usando."""
+    for conn in _POOL.values():
+        if conn.api is not None and not conn.lock.locked() and now - conn.last_used > MIKROTIK_POOL_IDLE:
+            conn.discard()
+
+
+# Escrituras en segundo plano (submit_async): una cola y un worker por router,
+# así se aplican en orden y sobre la sesión del pool. None en la cola = detener.
+_write_queues: Dict[Tuple[str, int, str, str], "asyncio.Queue[Optional[Callable[[], Awaitable]]]"] = {}
+_write_workers: List[asyncio.Task] = []
+
+
+async def _run_write_worker(queue: asyncio.Queue, host: str) -> None:
+    while True:
+        job = await queue.get()
+        if job is None:
+            return
+        try:
+            await job()
+        except Exception as e:
+            # Nadie espera el resultado: el log es el único rastro del fallo
+            logger.error(f"Escritura en segundo plano falló en MikroTik {host}: {e}")
+        finally:
+            queue.task_done()
+
+
+async def stop_mikrotik_writers() -> None:
+    """Aplica las escrituras pendientes y detiene los workers."""
+    if not _write_workers:
+        return
+    for queue in _write_queues.values():
+        await queue.put(None)
+    await asyncio.gather(*_write_workers)
+    _write_workers.clear()
+    _write_queues.clear()
+
+
+def close_mikrotik_pool():
+    """Cierra todas las sesiones del pool (shutdown de la app)."""
+    for conn in _POOL.values():
+        conn.discard()
+    _POOL.clear()
+
+
 class MikroTikService:
     """
     Servicio para interactuar con MikroTik RouterOS vía API 8728.
@@ -55,7 +167,6 @@ class MikroTikService:
             username=username,
             password=password
         )
-        self._api = None
 
     # ================================================================
     # CONEXIÓN
@@ -71,17 +182,61 @@ class MikroTikService:
                 password=self.credentials.password,
                 timeout=10
             )
-            return api
         except (ConnectionRefusedError, OSError) as e:
             raise MikroTikError(
                 f"No se pudo conectar a MikroTik {self.credentials.host}:{self.credentials.port} - {e}"
             )
         except TrapError as e:
             raise MikroTikError(f"Error de autenticación en MikroTik: {e}")
+        self._tune_socket(api)
+        return api
 
-    async def _get_api(self):
-        """Obtiene conexión al API (crea una nueva cada vez para evitar timeouts)."""
-        return await asyncio.to_thread(self._connect_sync)
+    @staticmethod
+    def _tune_socket(api) -> None:
+        """
+        Sin Nagle: cada sentencia del API es chica y se espera su respuesta,
+        así que no tiene sentido que el kernel la retenga. Keepalive para que
+        una sesión del pool no quede colgada contra un router que se cayó.
+        """
+        try:
+            sock = api.protocol.transport.sock
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            if hasattr(socket, "TCP_KEEPIDLE"):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, MIKROTIK_KEEPALIVE_IDLE)
+            if hasattr(socket, "TCP_USER_TIMEOUT"):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_USER_TIMEOUT, MIKROTIK_USER_TIMEOUT_MS)
+        except (AttributeError, OSError) as e:
+            logger.debug(f"No se pudieron ajustar opciones de socket MikroTik: {e}")
+
+    def _pool_key(self) -> Tuple[str, int, str, str]:
+        creds = self.credentials
+        return (creds.host, creds.port, creds.username, creds.password)
+
+    @asynccontextmanager
+    async def _acquire(self):
+        """
+        Presta la sesión persistente del router, conectando si hace falta.
+        Una sesión ociosa más de MIKROTIK_POOL_IDLE se descarta (el router o
+        un NAT intermedio pueden haberla cortado). Ante cualquier falla que
+        no sea un error de RouterOS (TrapError) también se descarta: el
+        socket puede haber quedado a mitad de una respuesta.
+        """
+        conn = _POOL.setdefault(self._pool_key(), _PooledConn())
+        async with conn.lock:
+            now = time.monotonic()
+            _reap_idle(now)
+            if conn.api is None:
+                conn.api = await _run_blocking(self._connect_sync)
+            try:
+                yield conn.api
+            except (TrapError, MikroTikError):
+                raise
+            except BaseException:
+                conn.discard()
+                raise
+            finally:
+                conn.last_used = time.monotonic()
 
     async def _execute(self, path: str, command: str = "print", **kwargs) -> List[Dict[str, Any]]:
         """
@@ -89,39 +244,46 @@ class MikroTikService:
         
         Args:
             path: Ruta del API, ej: "/ppp/secret"
-            command: Comando (print, add, set, remove)
-            **kwargs: Parámetros del comando
+            command: Comando (print, find, add, set, remove)
+            **kwargs: Parámetros del comando (en find: campo=valor a filtrar)
         
         Returns:
             Lista de diccionarios con resultados
         """
         try:
-            api = await self._get_api()
-            try:
+            async with self._acquire() as api:
                 resource = api.path(path)
 
                 if command == "print":
-                    result = await asyncio.to_thread(
+                    result = await _run_blocking(
                         lambda: list(resource)
                     )
                     return result
 
+                elif command == "find":
+                    # Filtro del lado del router: vuelven solo los .id que coinciden
+                    where = [Key(field) == value for field, value in kwargs.items()]
+                    result = await _run_blocking(
+                        lambda: list(resource.select(Key(".id")).where(*where))
+                    )
+                    return result
+
                 elif command == "add":
-                    result = await asyncio.to_thread(
+                    result = await _run_blocking(
                         lambda: resource.add(**kwargs)
                     )
                     return [{"id": result}] if result else []
 
                 elif command == "set":
                     item_id = kwargs.pop("id")
-                    await asyncio.to_thread(
+                    await _run_blocking(
                         lambda: resource.update(**{"id": item_id, **kwargs})
                     )
                     return [{"status": "updated"}]
 
                 elif command == "remove":
                     item_id = kwargs.get("id")
-                    await asyncio.to_thread(
+                    await _run_blocking(
                         lambda: resource.remove(item_id)
                     )
                     return [{"status": "removed"}]
@@ -129,9 +291,6 @@ class MikroTikService:
                 else:
                     raise MikroTikError(f"Comando no soportado: {command}")
 
-            finally:
-                api.close()
-
         except TrapError as e:
             raise MikroTikError(f"Error MikroTik [{path}]: {e}")
         except ConnectionClosed:
@@ -143,6 +302,182 @@ class MikroTikService:
                 raise
             raise MikroTikError(f"Error inesperado: {e}")
 
+    def _submit(self, job: Callable[[], Awaitable]) -> None:
+        key = self._pool_key()
+        queue = _write_queues.get(key)
+        if queue is None:
+            queue = _write_queues[key] = asyncio.Queue()
+            _write_workers.append(asyncio.create_task(
+                _run_write_worker(queue, self.credentials.host)
+            ))
+        queue.put_nowait(job)
+
+    def submit_async(self, path: str, command: str, **kwargs) -> None:
+        """
+        Encola un comando para ejecutarlo en segundo plano y retorna sin
+        esperar al router. Solo para escrituras cuyo resultado no cambia lo
+        que se le responde al usuario; los errores quedan en el log.
+        """
+        self._submit(partial(self._execute, path, command, **kwargs))
+
+    async def _wait_writes(self) -> None:
+        """
+        Espera las escrituras encoladas para este router. Lo llaman las
+        operaciones sobre address-lists, para que un alta/baja encolada no
+        se aplique después de una operación posterior sobre la misma IP.
+        """
+        queue = _write_queues.get(self._pool_key())
+        if queue is not None:
+            await queue.join()
+
+    async def _find_id_by(
+        self,
+        path: str,
+        field: str,
+        value: str,
+        extra: Optional[Dict[str, str]] = None
+    ) -> Optional[str]:
+        """
+        Busca el .id interno de un item filtrando en el router (?field=value)
+        en vez de traer el listado completo. Retorna None si no existe.
+        """
+        rows = await self._execute(path, "find", **{field: value, **(extra or {})})
+        return rows[0].get(".id") if rows else None
+
+    @staticmethod
+    def _find_cmd(
+        path: str,
+        field: str,
+        value: str,
+        extra: Optional[Dict[str, str]] = None
+    ) -> Tuple[str, Dict[str, str]]:
+        """Sentencia de _pipeline equivalente a _find_id_by."""
+        params = {".proplist": ".id", f"?{field}": value}
+        for k, v in (extra or {}).items():
+            params[f"?{k}"] = v
+        return f"{path}/print", params
+
+    async def _find_ids(self, lookups: List[tuple]) -> List[Optional[str]]:
+        """
+        Varias búsquedas de _find_id_by en un solo pipeline.
+        lookups: [(path, field, value) o (path, field, value, extra)].
+        """
+        found = await self._pipeline([self._find_cmd(*lookup) for lookup in lookups])
+        return [rows[0].get(".id") if rows else None for rows in found]
+
+    @staticmethod
+    def _pipeline_sync(
+        api,
+        commands: List[Tuple[str, Dict[str, str]]],
+        atomic: bool = False
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Escribe todas las sentencias seguidas y recién después lee las
+        respuestas, emparejándolas por .tag (RouterOS puede contestarlas en
+        cualquier orden). Se arma sobre el protocolo de librouteros porque
+        Api.readSentence no acepta la palabra .tag.
+        """
+        protocol = api.protocol
+        for tag, (cmd, params) in enumerate(commands):
+            words = [
+                f"{k}={v}" if k.startswith("?") else f"={k}={v}"
+                for k, v in params.items()
+            ]
+            protocol.writeSentence(cmd, *words, f".tag={tag}")
+
+        replies: List[List[Dict[str, Any]]] = [[] for _ in commands]
+        traps: Dict[int, str] = {}
+        pending = len(commands)
+        while pending:
+            reply_word, words = protocol.readSentence()
+            if reply_word == "!fatal":
+                raise FatalError(" ".join(words))
+            tag = None
+            attrs = {}
+            for word in words:
+                if word.startswith(".tag="):
+                    tag = int(word[5:])
+                elif word.startswith("="):
+                    key, _, value = word[1:].partition("=")
+                    attrs[key] = value
+            if reply_word == "!trap":
+                traps.setdefault(tag, attrs.get("message", ""))
+            elif reply_word == "!re":
+                replies[tag].append(attrs)
+            elif reply_word == "!done":
+                if "ret" in attrs:
+                    replies[tag].append({"id": attrs["ret"]})
+                pending -= 1
+
+        if traps:
+            if atomic:
+                # Deshacer los add que sí entraron (best-effort)
+                undo = [
+                    (f"{cmd.rsplit('/', 1)[0]}/remove", {".id": replies[i][0]["id"]})
+                    for i, (cmd, _) in enumerate(commands)
+                    if i not in traps and cmd.endswith("/add") and replies[i]
+                ]
+                if undo:
+                    try:
+                        MikroTikService._pipeline_sync(api, undo)
+                    except TrapError as e:
+                        logger.error(f"No se pudo deshacer un alta parcial en MikroTik: {e}")
+            tag = min(traps)
+            raise TrapError(message=f"{commands[tag][0]}: {traps[tag]}")
+        return replies
+
+    async def _pipeline(
+        self,
+        commands: List[Tuple[str, Dict[str, str]]],
+        atomic: bool = False
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Ejecuta varios comandos en un solo viaje de ida y vuelta.
+
+        Args:
+            commands: [(ruta del comando, parámetros)], ej:
+                [("/ppp/secret/add", {...}), ("/queue/simple/add", {...})].
+                Las claves con "?" son filtros de print.
+            atomic: si algún comando falla, se eliminan los items que los
+                add del mismo pipeline alcanzaron a crear.
+
+        Returns:
+            Una lista por comando: filas (!re) o [{"id": ...}] si fue un add.
+            Si alguno falla se levanta MikroTikError (los demás ya corrieron).
+        """
+        try:
+            async with self._acquire() as api:
+                return await _run_blocking(self._pipeline_sync, api, commands, atomic)
+        except TrapError as e:
+            raise MikroTikError(f"Error MikroTik [{e}]")
+        except ConnectionClosed:
+            raise MikroTikError("Conexión cerrada por el MikroTik")
+        except FatalError as e:
+            raise MikroTikError(f"Error fatal MikroTik: {e}")
+        except Exception as e:
+            if isinstance(e, MikroTikError):
+                raise
+            raise MikroTikError(f"Error inesperado: {e}")
+
+    async def _bulk_remove(self, path: str, field: str, values: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Elimina muchos items por un campo (name, mac-address...). Un solo
+        print con .id + campo arma el índice valor → .id, y un solo remove
+        con los .id separados por coma los borra a todos.
+
+        Returns:
+            (valores eliminados, valores no encontrados)
+        """
+        if not values:
+            return [], []
+        (rows,) = await self._pipeline([(f"{path}/print", {".proplist": f".id,{field}"})])
+        index = {row.get(field): row[".id"] for row in rows if ".id" in row}
+        found = [v for v in values if v in index]
+        missing = [v for v in values if v not in index]
+        if found:
+            await self._pipeline([(f"{path}/remove", {".id": ",".join(index[v] for v in found)})])
+        return found, missing
+
     # ================================================================
     # TEST DE CONEXIÓN
     # ================================================================
@@ -185,6 +520,29 @@ class MikroTikService:
     # PPPoE SECRETS (FIBRA)
     # ================================================================
 
+    @staticmethod
+    def _pppoe_secret_params(
+        name: str,
+        password: str,
+        remote_address: str,
+        profile: str = "default",
+        local_address: str = "",
+        comment: str = "",
+        disabled: bool = False
+    ) -> Dict[str, str]:
+        params = {
+            "name": name,
+            "password": password,
+            "service": "pppoe",
+            "remote-address": remote_address,
+            "profile": profile,
+            "comment": comment,
+            "disabled": "yes" if disabled else "no"
+        }
+        if local_address:
+            params["local-address"] = local_address
+        return params
+
     async def create_pppoe_secret(
         self,
         name: str,
@@ -208,17 +566,9 @@ class MikroTikService:
             comment: Comentario identificador
             disabled: Si se crea deshabilitado
         """
-        params = {
-            "name": name,
-            "password": password,
-            "service": "pppoe",
-            "remote-address": remote_address,
-            "profile": profile,
-            "comment": comment,
-            "disabled": "yes" if disabled else "no"
-        }
-        if local_address:
-            params["local-address"] = local_address
+        params = self._pppoe_secret_params(
+            name, password, remote_address, profile, local_address, comment, disabled
+        )
 
         logger.info(f"Creando PPPoE Secret: {name} → {remote_address} (perfil: {profile})")
         result = await self._execute("/ppp/secret", "add", **params)
@@ -229,43 +579,40 @@ class MikroTikService:
         Elimina un PPPoE Secret por nombre de usuario.
         Primero busca el ID interno del secret, luego lo elimina.
         """
-        secrets = await self._execute("/ppp/secret")
-        target = None
-        for s in secrets:
-            if s.get("name") == name:
-                target = s
-                break
-
-        if not target:
+        secret_id = await self._find_id_by("/ppp/secret", "name", name)
+        if not secret_id:
             logger.warning(f"PPPoE Secret no encontrado: {name}")
             return {"action": "pppoe_secret_not_found", "name": name}
 
-        secret_id = target.get(".id")
         await self._execute("/ppp/secret", "remove", id=secret_id)
         logger.info(f"PPPoE Secret eliminado: {name}")
         return {"action": "pppoe_secret_deleted", "name": name}
 
     async def disable_pppoe_secret(self, name: str) -> Dict[str, Any]:
         """Deshabilita un PPPoE Secret (suspender cliente)."""
-        secrets = await self._execute("/ppp/secret")
-        for s in secrets:
-            if s.get("name") == name:
-                await self._execute("/ppp/secret", "set", id=s[".id"], disabled="yes")
-                logger.info(f"PPPoE Secret deshabilitado: {name}")
-                return {"action": "pppoe_secret_disabled", "name": name}
+        secret_id = await self._find_id_by("/ppp/secret", "name", name)
+        if not secret_id:
+            return {"action": "pppoe_secret_not_found", "name": name}
 
-        return {"action": "pppoe_secret_not_found", "name": name}
+        await self._execute("/ppp/secret", "set", id=secret_id, disabled="yes")
+        logger.info(f"PPPoE Secret deshabilitado: {name}")
+        return {"action": "pppoe_secret_disabled", "name": name}
 
     async def enable_pppoe_secret(self, name: str) -> Dict[str, Any]:
         """Habilita un PPPoE Secret (reactivar cliente)."""
-        secrets = await self._execute("/ppp/secret")
-        for s in secrets:
-            if s.get("name") == name:
-                await self._execute("/ppp/secret", "set", id=s[".id"], disabled="no")
-                logger.info(f"PPPoE Secret habilitado: {name}")
-                return {"action": "pppoe_secret_enabled", "name": name}
+        secret_id = await self._find_id_by("/ppp/secret", "name", name)
+        if not secret_id:
+            return {"action": "pppoe_secret_not_found", "name": name}
 
-        return {"action": "pppoe_secret_not_found", "name": name}
+        await self._execute("/ppp/secret", "set", id=secret_id, disabled="no")
+        logger.info(f"PPPoE Secret habilitado: {name}")
+        return {"action": "pppoe_secret_enabled", "name": name}
+
+    async def bulk_delete_pppoe_secrets(self, names: List[str]) -> Dict[str, Any]:
+        """Elimina varios PPPoE Secrets por nombre en dos viajes al router."""
+        deleted, not_found = await self._bulk_remove("/ppp/secret", "name", list(dict.fromkeys(names)))
+        logger.info(f"PPPoE Secrets eliminados: {len(deleted)} (no encontrados: {len(not_found)})")
+        return {"action": "pppoe_secrets_deleted", "deleted": deleted, "not_found": not_found}
 
     async def list_pppoe_secrets(self) -> List[Dict[str, Any]]:
         """Lista todos los PPPoE Secrets."""
@@ -279,6 +626,33 @@ class MikroTikService:
     # SIMPLE QUEUES (CONTROL DE VELOCIDAD)
     # ================================================================
 
+    @staticmethod
+    def _simple_queue_params(
+        name: str,
+        target: str,
+        max_limit_upload: str,
+        max_limit_download: str,
+        burst_limit: str = "",
+        burst_threshold: str = "",
+        burst_time: str = "",
+        comment: str = "",
+        disabled: bool = False
+    ) -> Dict[str, str]:
+        params = {
+            "name": name,
+            "target": target if "/" in target else f"{target}/32",
+            "max-limit": f"{max_limit_upload}/{max_limit_download}",
+            "comment": comment,
+            "disabled": "yes" if disabled else "no"
+        }
+        if burst_limit:
+            params["burst-limit"] = burst_limit
+        if burst_threshold:
+            params["burst-threshold"] = burst_threshold
+        if burst_time:
+            params["burst-time"] = burst_time
+        return params
+
     async def create_simple_queue(
         self,
         name: str,
@@ -304,19 +678,10 @@ class MikroTikService:
             burst_time: Tiempo burst (ej: "10/10")
             comment: Comentario
         """
-        params = {
-            "name": name,
-            "target": target if "/" in target else f"{target}/32",
-            "max-limit": f"{max_limit_upload}/{max_limit_download}",
-            "comment": comment,
-            "disabled": "yes" if disabled else "no"
-        }
-        if burst_limit:
-            params["burst-limit"] = burst_limit
-        if burst_threshold:
-            params["burst-threshold"] = burst_threshold
-        if burst_time:
-            params["burst-time"] = burst_time
+        params = self._simple_queue_params(
+            name, target, max_limit_upload, max_limit_download,
+            burst_limit, burst_threshold, burst_time, comment, disabled
+        )
 
         logger.info(f"Creando Queue: {name} → {target} ({max_limit_upload}/{max_limit_download})")
         result = await self._execute("/queue/simple", "add", **params)
@@ -324,14 +689,13 @@ class MikroTikService:
 
     async def delete_simple_queue(self, name: str) -> Dict[str, Any]:
         """Elimina una Simple Queue por nombre."""
-        queues = await self._execute("/queue/simple")
-        for q in queues:
-            if q.get("name") == name:
-                await self._execute("/queue/simple", "remove", id=q[".id"])
-                logger.info(f"Queue eliminada: {name}")
-                return {"action": "queue_deleted", "name": name}
+        queue_id = await self._find_id_by("/queue/simple", "name", name)
+        if not queue_id:
+            return {"action": "queue_not_found", "name": name}
 
-        return {"action": "queue_not_found", "name": name}
+        await self._execute("/queue/simple", "remove", id=queue_id)
+        logger.info(f"Queue eliminada: {name}")
+        return {"action": "queue_deleted", "name": name}
 
     async def update_simple_queue(
         self,
@@ -340,34 +704,39 @@ class MikroTikService:
         max_limit_download: str = None
     ) -> Dict[str, Any]:
         """Actualiza velocidad de una Queue existente."""
-        queues = await self._execute("/queue/simple")
-        for q in queues:
-            if q.get("name") == name:
-                params = {"id": q[".id"]}
-                if max_limit_upload and max_limit_download:
-                    params["max-limit"] = f"{max_limit_upload}/{max_limit_download}"
-                await self._execute("/queue/simple", "set", **params)
-                return {"action": "queue_updated", "name": name}
+        queue_id = await self._find_id_by("/queue/simple", "name", name)
+        if not queue_id:
+            return {"action": "queue_not_found", "name": name}
 
-        return {"action": "queue_not_found", "name": name}
+        params = {"id": queue_id}
+        if max_limit_upload and max_limit_download:
+            params["max-limit"] = f"{max_limit_upload}/{max_limit_download}"
+        await self._execute("/queue/simple", "set", **params)
+        return {"action": "queue_updated", "name": name}
 
     async def disable_simple_queue(self, name: str) -> Dict[str, Any]:
         """Deshabilita una queue (suspender)."""
-        queues = await self._execute("/queue/simple")
-        for q in queues:
-            if q.get("name") == name:
-                await self._execute("/queue/simple", "set", id=q[".id"], disabled="yes")
-                return {"action": "queue_disabled", "name": name}
-        return {"action": "queue_not_found", "name": name}
+        queue_id = await self._find_id_by("/queue/simple", "name", name)
+        if not queue_id:
+            return {"action": "queue_not_found", "name": name}
+
+        await self._execute("/queue/simple", "set", id=queue_id, disabled="yes")
+        return {"action": "queue_disabled", "name": name}
 
     async def enable_simple_queue(self, name: str) -> Dict[str, Any]:
         """Habilita una queue (reactivar)."""
-        queues = await self._execute("/queue/simple")
-        for q in queues:
-            if q.get("name") == name:
-                await self._execute("/queue/simple", "set", id=q[".id"], disabled="no")
-                return {"action": "queue_enabled", "name": name}
-        return {"action": "queue_not_found", "name": name}
+        queue_id = await self._find_id_by("/queue/simple", "name", name)
+        if not queue_id:
+            return {"action": "queue_not_found", "name": name}
+
+        await self._execute("/queue/simple", "set", id=queue_id, disabled="no")
+        return {"action": "queue_enabled", "name": name}
+
+    async def bulk_delete_simple_queues(self, names: List[str]) -> Dict[str, Any]:
+        """Elimina varias Simple Queues por nombre en dos viajes al router."""
+        deleted, not_found = await self._bulk_remove("/queue/simple", "name", list(dict.fromkeys(names)))
+        logger.info(f"Queues eliminadas: {len(deleted)} (no encontradas: {len(not_found)})")
+        return {"action": "queues_deleted", "deleted": deleted, "not_found": not_found}
 
     # ================================================================
     # ADDRESS LIST (MOROSOS / SUSPENSIÓN)
@@ -393,19 +762,25 @@ class MikroTikService:
             params["timeout"] = timeout
 
         logger.info(f"Agregando {address} a lista '{list_name}'")
+        await self._wait_writes()
         result = await self._execute("/ip/firewall/address-list", "add", **params)
         return {"action": "address_added", "list": list_name, "address": address, "result": result}
 
     async def remove_from_address_list(self, list_name: str, address: str) -> Dict[str, Any]:
         """Remueve una IP de un Address List."""
-        entries = await self._execute("/ip/firewall/address-list")
-        for entry in entries:
-            if entry.get("list") == list_name and entry.get("address") == address:
-                await self._execute("/ip/firewall/address-list", "remove", id=entry[".id"])
-                logger.info(f"Removido {address} de lista '{list_name}'")
-                return {"action": "address_removed", "list": list_name, "address": address}
+        await self._wait_writes()
+        return await self._remove_from_address_list(list_name, address)
 
-        return {"action": "address_not_found", "list": list_name, "address": address}
+    async def _remove_from_address_list(self, list_name: str, address: str) -> Dict[str, Any]:
+        entry_id = await self._find_id_by(
+            "/ip/firewall/address-list", "address", address, extra={"list": list_name}
+        )
+        if not entry_id:
+            return {"action": "address_not_found", "list": list_name, "address": address}
+
+        await self._execute("/ip/firewall/address-list", "remove", id=entry_id)
+        logger.info(f"Removido {address} de lista '{list_name}'")
+        return {"action": "address_removed", "list": list_name, "address": address}
 
     # ================================================================
     # INTERFACES (LECTURA)
@@ -490,6 +865,22 @@ class MikroTikService:
         """Lista todos los DHCP Leases del MikroTik."""
         return await self._execute("/ip/dhcp-server/lease")
 
+    @staticmethod
+    def _dhcp_lease_params(
+        mac_address: str,
+        ip_address: str,
+        server: str = "dhcp1",
+        comment: str = "",
+        disabled: bool = False
+    ) -> Dict[str, str]:
+        return {
+            "mac-address": mac_address.upper(),
+            "address": ip_address,
+            "server": server,
+            "comment": comment,
+            "disabled": "yes" if disabled else "no"
+        }
+
     async def create_dhcp_lease(
         self,
         mac_address: str,
@@ -508,13 +899,7 @@ class MikroTikService:
             server: Nombre del DHCP server (ej: "dhcp1")
             comment: Comentario identificador
         """
-        params = {
-            "mac-address": mac_address.upper(),
-            "address": ip_address,
-            "server": server,
-            "comment": comment,
-            "disabled": "yes" if disabled else "no"
-        }
+        params = self._dhcp_lease_params(mac_address, ip_address, server, comment, disabled)
 
         logger.info(f"Creando DHCP Lease: {mac_address} → {ip_address}")
         result = await self._execute("/ip/dhcp-server/lease", "add", **params)
@@ -522,39 +907,44 @@ class MikroTikService:
 
     async def delete_dhcp_lease(self, mac_address: str) -> Dict[str, Any]:
         """Elimina un DHCP Lease por MAC address."""
-        leases = await self._execute("/ip/dhcp-server/lease")
-        mac_upper = mac_address.upper()
-        for lease in leases:
-            if lease.get("mac-address", "").upper() == mac_upper:
-                await self._execute("/ip/dhcp-server/lease", "remove", id=lease[".id"])
-                logger.info(f"DHCP Lease eliminado: {mac_address}")
-                return {"action": "dhcp_lease_deleted", "mac": mac_address}
+        # RouterOS guarda la MAC en mayúsculas
+        lease_id = await self._find_id_by("/ip/dhcp-server/lease", "mac-address", mac_address.upper())
+        if not lease_id:
+            return {"action": "dhcp_lease_not_found", "mac": mac_address}
 
-        return {"action": "dhcp_lease_not_found", "mac": mac_address}
+        await self._execute("/ip/dhcp-server/lease", "remove", id=lease_id)
+        logger.info(f"DHCP Lease eliminado: {mac_address}")
+        return {"action": "dhcp_lease_deleted", "mac": mac_address}
 
     async def disable_dhcp_lease(self, mac_address: str) -> Dict[str, Any]:
         """Deshabilita un DHCP Lease (suspender cliente DHCP)."""
-        leases = await self._execute("/ip/dhcp-server/lease")
-        mac_upper = mac_address.upper()
-        for lease in leases:
-            if lease.get("mac-address", "").upper() == mac_upper:
-                await self._execute("/ip/dhcp-server/lease", "set", id=lease[".id"], disabled="yes")
-                logger.info(f"DHCP Lease deshabilitado: {mac_address}")
-                return {"action": "dhcp_lease_disabled", "mac": mac_address}
+        # RouterOS guarda la MAC en mayúsculas
+        lease_id = await self._find_id_by("/ip/dhcp-server/lease", "mac-address", mac_address.upper())
+        if not lease_id:
+            return {"action": "dhcp_lease_not_found", "mac": mac_address}
 
-        return {"action": "dhcp_lease_not_found", "mac": mac_address}
+        await self._execute("/ip/dhcp-server/lease", "set", id=lease_id, disabled="yes")
+        logger.info(f"DHCP Lease deshabilitado: {mac_address}")
+        return {"action": "dhcp_lease_disabled", "mac": mac_address}
 
     async def enable_dhcp_lease(self, mac_address: str) -> Dict[str, Any]:
         """Habilita un DHCP Lease (reactivar cliente DHCP)."""
-        leases = await self._execute("/ip/dhcp-server/lease")
-        mac_upper = mac_address.upper()
-        for lease in leases:
-            if lease.get("mac-address", "").upper() == mac_upper:
-                await self._execute("/ip/dhcp-server/lease", "set", id=lease[".id"], disabled="no")
-                logger.info(f"DHCP Lease habilitado: {mac_address}")
-                return {"action": "dhcp_lease_enabled", "mac": mac_address}
-
-        return {"action": "dhcp_lease_not_found", "mac": mac_address}
+        # RouterOS guarda la MAC en mayúsculas
+        lease_id = await self._find_id_by("/ip/dhcp-server/lease", "mac-address", mac_address.upper())
+        if not lease_id:
+            return {"action": "dhcp_lease_not_found", "mac": mac_address}
+
+        await self._execute("/ip/dhcp-server/lease", "set", id=lease_id, disabled="no")
+        logger.info(f"DHCP Lease habilitado: {mac_address}")
+        return {"action": "dhcp_lease_enabled", "mac": mac_address}
+
+    async def bulk_delete_dhcp_leases(self, mac_addresses: List[str]) -> Dict[str, Any]:
+        """Elimina varios DHCP Leases por MAC en dos viajes al router."""
+        # RouterOS guarda la MAC en mayúsculas
+        macs = list(dict.fromkeys(mac.upper() for mac in mac_addresses))
+        deleted, not_found = await self._bulk_remove("/ip/dhcp-server/lease", "mac-address", macs)
+        logger.info(f"DHCP Leases eliminados: {len(deleted)} (no encontrados: {len(not_found)})")
+        return {"action": "dhcp_leases_deleted", "deleted": deleted, "not_found": not_found}
 
     async def get_dhcp_servers(self) -> List[Dict[str, Any]]:
         """Lista los DHCP Servers configurados en el MikroTik."""
@@ -582,38 +972,32 @@ class MikroTikService:
         Provisiona un cliente FIBRA DHCP completo en MikroTik:
         1. Crea DHCP Lease estático (MAC → IP fija)
         2. Crea Simple Queue (control de velocidad)
+        Ambos add van en un solo pipeline; si uno falla se deshace el otro.
 
         Returns:
             Dict con resultados de ambas operaciones
         """
         results = {}
         comment = f"ISP-AUTO: {client_name}" if client_name else f"ISP-AUTO: {mac_address}"
-
-        # 1. Crear DHCP Lease
-        lease_result = await self.create_dhcp_lease(
-            mac_address=mac_address,
-            ip_address=ip_address,
-            server=dhcp_server,
-            comment=comment
-        )
-        results["dhcp_lease"] = lease_result
-
-        # 2. Crear Simple Queue
-        queue_name = f"queue_dhcp_{ip_address.replace('.', '_')}"
+        queue_name = _dhcp_queue_name(ip_address)
         burst_lim = f"{burst_upload}/{burst_download}" if burst_upload else ""
         burst_thr = f"{burst_threshold_up}/{burst_threshold_down}" if burst_threshold_up else ""
 
-        queue_result = await self.create_simple_queue(
-            name=queue_name,
-            target=ip_address,
-            max_limit_upload=upload_speed,
-            max_limit_download=download_speed,
-            burst_limit=burst_lim,
-            burst_threshold=burst_thr,
-            burst_time=burst_time,
-            comment=comment
-        )
-        results["queue"] = queue_result
+        lease_result, queue_result = await self._pipeline([
+            ("/ip/dhcp-server/lease/add", self._dhcp_lease_params(
+                mac_address, ip_address, dhcp_server, comment
+            )),
+            ("/queue/simple/add", self._simple_queue_params(
+                queue_name, ip_address, upload_speed, download_speed,
+                burst_lim, burst_thr, burst_time, comment
+            )),
+        ], atomic=True)
+        results["dhcp_lease"] = {
+            "action": "dhcp_lease_created", "mac": mac_address, "ip": ip_address, "result": lease_result
+        }
+        results["queue"] = {
+            "action": "queue_created", "name": queue_name, "target": ip_address, "result": queue_result
+        }
 
         logger.info(f"Cliente DHCP provisionado: {mac_address} → {ip_address}")
         return results
@@ -623,48 +1007,106 @@ class MikroTikService:
         Elimina un cliente DHCP del MikroTik:
         1. Elimina DHCP Lease
         2. Elimina Simple Queue
+        Dos pipelines: búsqueda de los .id y luego los remove.
         """
         results = {}
+        queue_name = _dhcp_queue_name(ip_address) if ip_address else ""
 
-        # 1. Eliminar DHCP Lease
-        results["dhcp_lease"] = await self.delete_dhcp_lease(mac_address)
-
-        # 2. Eliminar Queue
+        lookups = [("/ip/dhcp-server/lease", "mac-address", mac_address.upper())]
+        if ip_address:
+            lookups.append(("/queue/simple", "name", queue_name))
+        ids = await self._find_ids(lookups)
+        removes = [
+            (f"{lookup[0]}/remove", {".id": item_id})
+            for lookup, item_id in zip(lookups, ids) if item_id
+        ]
+        if removes:
+            await self._pipeline(removes)
+
+        results["dhcp_lease"] = {
+            "action": "dhcp_lease_deleted" if ids[0] else "dhcp_lease_not_found", "mac": mac_address
+        }
         if ip_address:
-            queue_name = f"queue_dhcp_{ip_address.replace('.', '_')}"
-            results["queue"] = await self.delete_simple_queue(queue_name)
+            results["queue"] = {"action": "queue_deleted" if ids[1] else "queue_not_found", "name": queue_name}
 
         logger.info(f"Cliente DHCP eliminado del MikroTik: {mac_address}")
         return results
 
     async def suspend_dhcp_client(self, mac_address: str, ip_address: str = "") -> Dict[str, Any]:
-        """Suspende cliente DHCP: deshabilita lease + queue + agrega a morosos."""
+        """
+        Suspende cliente DHCP: deshabilita lease + queue + agrega a morosos.
+        Dos pipelines: búsqueda de los .id y luego todas las escrituras.
+        """
         results = {}
+        queue_name = _dhcp_queue_name(ip_address) if ip_address else ""
 
-        results["dhcp_lease"] = await self.disable_dhcp_lease(mac_address)
-
+        lookups = [("/ip/dhcp-server/lease", "mac-address", mac_address.upper())]
         if ip_address:
-            queue_name = f"queue_dhcp_{ip_address.replace('.', '_')}"
-            results["queue"] = await self.disable_simple_queue(queue_name)
-            results["morosos"] = await self.add_to_address_list(
-                list_name="morosos",
-                address=ip_address,
-                comment="Suspendido por sistema"
-            )
+            lookups.append(("/queue/simple", "name", queue_name))
+        ids = await self._find_ids(lookups)
+        lease_id = ids[0]
+        queue_id = ids[1] if ip_address else None
+
+        writes = []
+        if lease_id:
+            writes.append(("/ip/dhcp-server/lease/set", {".id": lease_id, "disabled": "yes"}))
+        if queue_id:
+            writes.append(("/queue/simple/set", {".id": queue_id, "disabled": "yes"}))
+        if ip_address:
+            writes.append(("/ip/firewall/address-list/add", {
+                "list": "morosos", "address": ip_address, "comment": "Suspendido por sistema"
+            }))
+            await self._wait_writes()
+        replies = await self._pipeline(writes) if writes else []
+
+        results["dhcp_lease"] = {
+            "action": "dhcp_lease_disabled" if lease_id else "dhcp_lease_not_found", "mac": mac_address
+        }
+        if ip_address:
+            results["queue"] = {"action": "queue_disabled" if queue_id else "queue_not_found", "name": queue_name}
+            results["morosos"] = {
+                "action": "address_added", "list": "morosos", "address": ip_address, "result": replies[-1]
+            }
 
         logger.info(f"Cliente DHCP suspendido: {mac_address}")
         return results
 
     async def reactivate_dhcp_client(self, mac_address: str, ip_address: str = "") -> Dict[str, Any]:
-        """Reactiva cliente DHCP suspendido."""
+        """
+        Reactiva cliente DHCP suspendido.
+        Dos pipelines: búsqueda de los .id y luego todas las escrituras.
+        """
         results = {}
+        queue_name = _dhcp_queue_name(ip_address) if ip_address else ""
 
-        results["dhcp_lease"] = await self.enable_dhcp_lease(mac_address)
-
+        lookups = [("/ip/dhcp-server/lease", "mac-address", mac_address.upper())]
         if ip_address:
-            queue_name = f"queue_dhcp_{ip_address.replace('.', '_')}"
-            results["queue"] = await self.enable_simple_queue(queue_name)
-            results["morosos"] = await self.remove_from_address_list("morosos", ip_address)
+            await self._wait_writes()
+            lookups.append(("/queue/simple", "name", queue_name))
+            lookups.append(("/ip/firewall/address-list", "address", ip_address, {"list": "morosos"}))
+        ids = await self._find_ids(lookups)
+        lease_id = ids[0]
+        queue_id, entry_id = (ids[1], ids[2]) if ip_address else (None, None)
+
+        writes = []
+        if lease_id:
+            writes.append(("/ip/dhcp-server/lease/set", {".id": lease_id, "disabled": "no"}))
+        if queue_id:
+            writes.append(("/queue/simple/set", {".id": queue_id, "disabled": "no"}))
+        if entry_id:
+            writes.append(("/ip/firewall/address-list/remove", {".id": entry_id}))
+        if writes:
+            await self._pipeline(writes)
+
+        results["dhcp_lease"] = {
+            "action": "dhcp_lease_enabled" if lease_id else "dhcp_lease_not_found", "mac": mac_address
+        }
+        if ip_address:
+            results["queue"] = {"action": "queue_enabled" if queue_id else "queue_not_found", "name": queue_name}
+            results["morosos"] = {
+                "action": "address_removed" if entry_id else "address_not_found",
+                "list": "morosos", "address": ip_address
+            }
 
         logger.info(f"Cliente DHCP reactivado: {mac_address}")
         return results
@@ -692,39 +1134,32 @@ class MikroTikService:
         Provisiona un cliente FIBRA completo en MikroTik:
         1. Crea PPPoE Secret (usuario + password + IP + perfil)
         2. Crea Simple Queue (control de velocidad)
+        Ambos add van en un solo pipeline; si uno falla se deshace el otro.
         
         Returns:
             Dict con resultados de ambas operaciones
         """
         results = {}
         comment = f"ISP-AUTO: {client_name}" if client_name else f"ISP-AUTO: {pppoe_username}"
-
-        # 1. Crear PPPoE Secret
-        secret_result = await self.create_pppoe_secret(
-            name=pppoe_username,
-            password=pppoe_password,
-            remote_address=ip_address,
-            profile=profile,
-            comment=comment
-        )
-        results["pppoe_secret"] = secret_result
-
-        # 2. Crear Simple Queue
-        queue_name = f"queue_{pppoe_username}"
+        queue_name = _fiber_queue_name(pppoe_username)
         burst_lim = f"{burst_upload}/{burst_download}" if burst_upload else ""
         burst_thr = f"{burst_threshold_up}/{burst_threshold_down}" if burst_threshold_up else ""
 
-        queue_result = await self.create_simple_queue(
-            name=queue_name,
-            target=ip_address,
-            max_limit_upload=upload_speed,
-            max_limit_download=download_speed,
-            burst_limit=burst_lim,
-            burst_threshold=burst_thr,
-            burst_time=burst_time,
-            comment=comment
-        )
-        results["queue"] = queue_result
+        secret_result, queue_result = await self._pipeline([
+            ("/ppp/secret/add", self._pppoe_secret_params(
+                pppoe_username, pppoe_password, ip_address, profile, comment=comment
+            )),
+            ("/queue/simple/add", self._simple_queue_params(
+                queue_name, ip_address, upload_speed, download_speed,
+                burst_lim, burst_thr, burst_time, comment
+            )),
+        ], atomic=True)
+        results["pppoe_secret"] = {
+            "action": "pppoe_secret_created", "name": pppoe_username, "ip": ip_address, "result": secret_result
+        }
+        results["queue"] = {
+            "action": "queue_created", "name": queue_name, "target": ip_address, "result": queue_result
+        }
 
         logger.info(f"Cliente FIBRA provisionado: {pppoe_username} → {ip_address}")
         return results
@@ -746,37 +1181,33 @@ class MikroTikService:
         Provisiona un cliente ANTENA completo en MikroTik:
         1. Crea Simple Queue (control de velocidad por IP)
         2. (Opcional) Agrega a address-list de clientes activos
+        Ambos add van en un solo pipeline; si uno falla se deshace el otro.
         
         Returns:
             Dict con resultados
         """
         results = {}
-        queue_name = f"queue_{ip_address.replace('.', '_')}"
+        queue_name = _antenna_queue_name(ip_address)
         comment = f"ISP-AUTO: {client_name}" if client_name else f"ISP-AUTO: {ip_address}"
-
-        # 1. Crear Simple Queue
         burst_lim = f"{burst_upload}/{burst_download}" if burst_upload else ""
         burst_thr = f"{burst_threshold_up}/{burst_threshold_down}" if burst_threshold_up else ""
 
-        queue_result = await self.create_simple_queue(
-            name=queue_name,
-            target=ip_address,
-            max_limit_upload=upload_speed,
-            max_limit_download=download_speed,
-            burst_limit=burst_lim,
-            burst_threshold=burst_thr,
-            burst_time=burst_time,
-            comment=comment
-        )
-        results["queue"] = queue_result
-
-        # 2. Agregar a lista de clientes activos
-        addr_result = await self.add_to_address_list(
-            list_name="clientes_activos",
-            address=ip_address,
-            comment=comment
-        )
-        results["address_list"] = addr_result
+        await self._wait_writes()
+        queue_result, addr_result = await self._pipeline([
+            ("/queue/simple/add", self._simple_queue_params(
+                queue_name, ip_address, upload_speed, download_speed,
+                burst_lim, burst_thr, burst_time, comment
+            )),
+            ("/ip/firewall/address-list/add", {
+                "list": "clientes_activos", "address": ip_address, "comment": comment
+            }),
+        ], atomic=True)
+        results["queue"] = {
+            "action": "queue_created", "name": queue_name, "target": ip_address, "result": queue_result
+        }
+        results["address_list"] = {
+            "action": "address_added", "list": "clientes_activos", "address": ip_address, "result": addr_result
+        }
 
         logger.info(f"Cliente ANTENA provisionado: {ip_address}")
         return results
@@ -790,21 +1221,33 @@ class MikroTikService:
         Elimina un cliente FIBRA del MikroTik:
         1. Elimina PPPoE Secret
         2. Elimina Simple Queue
+        Dos pipelines: búsqueda de los .id y luego los remove.
         """
         results = {}
+        queue_name = _fiber_queue_name(pppoe_username)
+
+        lookups = [("/ppp/secret", "name", pppoe_username), ("/queue/simple", "name", queue_name)]
+        secret_id, queue_id = await self._find_ids(lookups)
+        removes = [
+            (f"{lookup[0]}/remove", {".id": item_id})
+            for lookup, item_id in zip(lookups, (secret_id, queue_id)) if item_id
+        ]
+        if removes:
+            await self._pipeline(removes)
+
+        if not secret_id:
+            logger.warning(f"PPPoE Secret no encontrado: {pppoe_username}")
+        results["pppoe_secret"] = {
+            "action": "pppoe_secret_deleted" if secret_id else "pppoe_secret_not_found", "name": pppoe_username
+        }
+        results["queue"] = {"action": "queue_deleted" if queue_id else "queue_not_found", "name": queue_name}
 
-        # 1. Eliminar PPPoE Secret
-        results["pppoe_secret"] = await self.delete_pppoe_secret(pppoe_username)
-
-        # 2. Eliminar Queue
-        queue_name = f"queue_{pppoe_username}"
-        results["queue"] = await self.delete_simple_queue(queue_name)
-
-        # 3. Remover de address-list si existe
+        # 3. Remover de address-list si existe (limpieza, en segundo plano)
         if ip_address:
-            results["address_list"] = await self.remove_from_address_list(
-                "clientes_activos", ip_address
-            )
+            self._submit(partial(self._remove_from_address_list, "clientes_activos", ip_address))
+            results["address_list"] = {
+                "action": "address_remove_queued", "list": "clientes_activos", "address": ip_address
+            }
 
         logger.info(f"Cliente FIBRA eliminado del MikroTik: {pppoe_username}")
         return results
@@ -817,11 +1260,13 @@ class MikroTikService:
         """
         results = {}
 
-        queue_name = f"queue_{ip_address.replace('.', '_')}"
+        queue_name = _antenna_queue_name(ip_address)
         results["queue"] = await self.delete_simple_queue(queue_name)
-        results["address_list"] = await self.remove_from_address_list(
-            "clientes_activos", ip_address
-        )
+        # Limpieza de la lista de activos, en segundo plano
+        self._submit(partial(self._remove_from_address_list, "clientes_activos", ip_address))
+        results["address_list"] = {
+            "action": "address_remove_queued", "list": "clientes_activos", "address": ip_address
+        }
 
         logger.info(f"Cliente ANTENA eliminado del MikroTik: {ip_address}")
         return results
@@ -836,24 +1281,50 @@ class MikroTikService:
         Suspende un cliente (por falta de pago, etc).
         FIBRA: Deshabilita PPPoE Secret + Queue + Agrega a morosos
         ANTENA: Deshabilita Queue + Agrega a morosos
+        Dos pipelines: búsqueda de los .id y luego todas las escrituras.
         """
         results = {}
-
-        if connection_type == "fiber" and pppoe_username:
-            results["pppoe"] = await self.disable_pppoe_secret(pppoe_username)
-            queue_name = f"queue_{pppoe_username}"
-            results["queue"] = await self.disable_simple_queue(queue_name)
-
+        fiber = connection_type == "fiber" and bool(pppoe_username)
+        lookups = []
+        if fiber:
+            queue_name = _fiber_queue_name(pppoe_username)
+            lookups = [("/ppp/secret", "name", pppoe_username), ("/queue/simple", "name", queue_name)]
         elif connection_type == "antenna" and ip_address:
-            queue_name = f"queue_{ip_address.replace('.', '_')}"
-            results["queue"] = await self.disable_simple_queue(queue_name)
-
-        if ip_address:
-            results["morosos"] = await self.add_to_address_list(
-                list_name="morosos",
-                address=ip_address,
-                comment="Suspendido por sistema"
+            queue_name = _antenna_queue_name(ip_address)
+            lookups = [("/queue/simple", "name", queue_name)]
+
+        ids = await self._find_ids(lookups) if lookups else []
+        writes = [
+            (f"{lookup[0]}/set", {".id": item_id, "disabled": "yes"})
+            for lookup, item_id in zip(lookups, ids) if item_id
+        ]
+        if ip_address and not fiber:
+            # En ANTENA morosos es el corte: va con el resto de las escrituras
+            await self._wait_writes()
+            writes.append(("/ip/firewall/address-list/add", {
+                "list": "morosos", "address": ip_address, "comment": "Suspendido por sistema"
+            }))
+        replies = await self._pipeline(writes) if writes else []
+
+        if fiber:
+            results["pppoe"] = {
+                "action": "pppoe_secret_disabled" if ids[0] else "pppoe_secret_not_found", "name": pppoe_username
+            }
+        if lookups:
+            results["queue"] = {"action": "queue_disabled" if ids[-1] else "queue_not_found", "name": queue_name}
+
+        if ip_address and fiber:
+            # En FIBRA el corte lo hace el secret deshabilitado: morosos es
+            # solo una marca y no hace falta esperar al router
+            self.submit_async(
+                "/ip/firewall/address-list", "add",
+                list="morosos", address=ip_address, comment="Suspendido por sistema"
             )
+            results["morosos"] = {"action": "address_add_queued", "list": "morosos", "address": ip_address}
+        elif ip_address:
+            results["morosos"] = {
+                "action": "address_added", "list": "morosos", "address": ip_address, "result": replies[-1]
+            }
 
         logger.info(f"Cliente suspendido: {pppoe_username or ip_address}")
         return results
@@ -866,20 +1337,46 @@ class MikroTikService:
     ) -> Dict[str, Any]:
         """
         Reactiva un cliente suspendido.
+        Dos pipelines: búsqueda de los .id y luego todas las escrituras.
         """
         results = {}
-
-        if connection_type == "fiber" and pppoe_username:
-            results["pppoe"] = await self.enable_pppoe_secret(pppoe_username)
-            queue_name = f"queue_{pppoe_username}"
-            results["queue"] = await self.enable_simple_queue(queue_name)
-
+        fiber = connection_type == "fiber" and bool(pppoe_username)
+        lookups = []
+        if fiber:
+            queue_name = _fiber_queue_name(pppoe_username)
+            lookups = [("/ppp/secret", "name", pppoe_username), ("/queue/simple", "name", queue_name)]
         elif connection_type == "antenna" and ip_address:
-            queue_name = f"queue_{ip_address.replace('.', '_')}"
-            results["queue"] = await self.enable_simple_queue(queue_name)
-
+            queue_name = _antenna_queue_name(ip_address)
+            lookups = [("/queue/simple", "name", queue_name)]
+        enable_count = len(lookups)
         if ip_address:
-            results["morosos"] = await self.remove_from_address_list("morosos", ip_address)
+            await self._wait_writes()
+            lookups.append(("/ip/firewall/address-list", "address", ip_address, {"list": "morosos"}))
+
+        ids = await self._find_ids(lookups) if lookups else []
+        writes = [
+            (f"{lookup[0]}/set", {".id": item_id, "disabled": "no"})
+            for lookup, item_id in zip(lookups[:enable_count], ids) if item_id
+        ]
+        entry_id = ids[-1] if ip_address else None
+        if entry_id:
+            writes.append(("/ip/firewall/address-list/remove", {".id": entry_id}))
+        if writes:
+            await self._pipeline(writes)
+
+        if fiber:
+            results["pppoe"] = {
+                "action": "pppoe_secret_enabled" if ids[0] else "pppoe_secret_not_found", "name": pppoe_username
+            }
+        if enable_count:
+            results["queue"] = {
+                "action": "queue_enabled" if ids[enable_count - 1] else "queue_not_found", "name": queue_name
+            }
+        if ip_address:
+            results["morosos"] = {
+                "action": "address_removed" if entry_id else "address_not_found",
+                "list": "morosos", "address": ip_address
+            }
 
         logger.info(f"Cliente reactivado: {pppoe_username or ip_address}")
         return results
\ No newline at end of file
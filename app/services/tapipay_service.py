@@ -22,6 +22,16 @@ import httpx
 
 logger = logging.getLogger("tapipay_service")
 
+# Cliente HTTP compartido por todas las instancias de TapipayService:
+# mantiene conexiones vivas (keep-alive / HTTP2) y las llamadas en
+# paralelo de la facturación masiva se reparten sobre el mismo pool.
+# Se cierra en el lifespan de la app (app.main).
+TAPIPAY_HTTP = httpx.AsyncClient(
+    http2=True,
+    timeout=30,
+    limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+)
+
 
 class TapipayError(Exception):
     """Error de comunicación con tapipay."""
@@ -76,32 +86,31 @@ class TapipayService:
         El token se cachea para reutilizar en múltiples llamadas.
         """
         try:
-            async with httpx.AsyncClient(timeout=30) as client:
-                response = await client.post(
-                    self.login_url,
-                    headers={
-                        "Content-Type": "application/json",
-                        "x-api-key": self.api_key,
-                    },
-                    json={
-                        "clientUsername": self.username,
-                        "password": self.password,
-                    }
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    self._access_token = data["accessToken"]
-                    self._token_expires_at = datetime.utcnow() + timedelta(minutes=50)
-                    logger.info("Login exitoso en tapipay")
-                    return self._access_token
+            response = await TAPIPAY_HTTP.post(
+                self.login_url,
+                headers={
+                    "Content-Type": "application/json",
+                    "x-api-key": self.api_key,
+                },
+                json={
+                    "clientUsername": self.username,
+                    "password": self.password,
+                }
+            )
 
-                elif response.status_code == 400:
-                    raise TapipayError("Credenciales de tapipay incorrectas")
-                else:
-                    raise TapipayError(
-                        f"Error login tapipay: HTTP {response.status_code} - {response.text}"
-                    )
+            if response.status_code == 200:
+                data = response.json()
+                self._access_token = data["accessToken"]
+                self._token_expires_at = datetime.utcnow() + timedelta(minutes=50)
+                logger.info("Login exitoso en tapipay")
+                return self._access_token
+
+            elif response.status_code == 400:
+                raise TapipayError("Credenciales de tapipay incorrectas")
+            else:
+                raise TapipayError(
+                    f"Error login tapipay: HTTP {response.status_code} - {response.text}"
+                )
 
         except httpx.RequestError as e:
             raise TapipayError(f"Error de conexión con tapipay: {e}")
@@ -116,6 +125,13 @@ class TapipayService:
             await self.login()
         return self._access_token
 
+    async def ensure_token(self) -> None:
+        """
+        Deja un token válido en caché. Útil antes de lanzar varias
+        llamadas en paralelo, para que no haga login cada una.
+        """
+        await self._get_token()
+
     def _get_headers(self, token: str) -> dict:
         """Headers para llamadas autenticadas."""
         return {
@@ -217,38 +233,37 @@ class TapipayService:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=30) as client:
-                response = await client.post(
-                    self.references_url,
-                    headers=self._get_headers(token),
-                    json=body,
-                )
-
-                if response.status_code in (200, 201):
-                    data = response.json()
-                    logger.info(
-                        f"Deuda creada en tapipay: {identifier_value} "
-                        f"${amount} tx={data.get('tx')}"
-                    )
-                    return {
-                        "success": True,
-                        "amount": data.get("amount"),
-                        "currency": data.get("currency"),
-                        "tx": data.get("tx"),
-                        "main_tx": data.get("mainTx"),
-                        "references": data.get("references", []),
-                        "external_request_id": external_request_id,
-                    }
+            response = await TAPIPAY_HTTP.post(
+                self.references_url,
+                headers=self._get_headers(token),
+                json=body,
+            )
 
-                elif response.status_code == 400:
-                    error_data = response.json() if response.text else {}
-                    raise TapipayError(f"Error validación tapipay: {error_data}")
-                elif response.status_code == 422:
-                    raise TapipayError("Empresa temporalmente no disponible en tapipay")
-                else:
-                    raise TapipayError(
-                        f"Error tapipay: HTTP {response.status_code} - {response.text[:300]}"
-                    )
+            if response.status_code in (200, 201):
+                data = response.json()
+                logger.info(
+                    f"Deuda creada en tapipay: {identifier_value} "
+                    f"${amount} tx={data.get('tx')}"
+                )
+                return {
+                    "success": True,
+                    "amount": data.get("amount"),
+                    "currency": data.get("currency"),
+                    "tx": data.get("tx"),
+                    "main_tx": data.get("mainTx"),
+                    "references": data.get("references", []),
+                    "external_request_id": external_request_id,
+                }
+
+            elif response.status_code == 400:
+                error_data = response.json() if response.text else {}
+                raise TapipayError(f"Error validación tapipay: {error_data}")
+            elif response.status_code == 422:
+                raise TapipayError("Empresa temporalmente no disponible en tapipay")
+            else:
+                raise TapipayError(
+                    f"Error tapipay: HTTP {response.status_code} - {response.text[:300]}"
+                )
 
         except httpx.RequestError as e:
             raise TapipayError(f"Error de conexión con tapipay: {e}")
@@ -0,0 +1,69 @@
+"""
+NetKeeper - Respuestas JSON en streaming
+Listados que se serializan fila por fila a medida que llegan de la BD,
+en vez de armar la lista completa en memoria.
+"""
+from typing import Any, Callable, Optional
+
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from app.database import AsyncSessionLocal
+
+
+async def stream_json_rows(
+    query,
+    head: bytes,
+    dump_row: Callable[[Any], bytes],
+    tail: Callable[[Optional[Any]], bytes],
+    limit: Optional[int] = None,
+    scalars: bool = False,
+) -> StreamingResponse:
+    """
+    Ejecuta `query` y responde head + filas (dump_row, separadas por
+    comas) + tail(...). El JSON lo completan head y tail.
+
+    La consulta se ejecuta antes de responder: si falla (conexión, SQL)
+    sale un 500 normal y no un 200 con el JSON cortado. Sesión propia:
+    la de get_db ya está cerrada cuando se envía el cuerpo.
+
+    Con `limit` la consulta pide limit + 1 filas; la extra solo indica que
+    hay otra página: tail recibe la última fila enviada (None si no hay más).
+    """
+    session = AsyncSessionLocal()
+    try:
+        if scalars:
+            result = await session.stream_scalars(query)
+        else:
+            result = await session.stream(query)
+    except Exception:
+        await session.close()
+        raise
+
+    return StreamingResponse(
+        _stream_rows(session, result, head, dump_row, tail, limit),
+        media_type="application/json",
+        background=BackgroundTask(session.close),
+    )
+
+
+async def _stream_rows(session, result, head, dump_row, tail, limit):
+    """Arma el cuerpo; cierra el resultado y la sesión al terminar."""
+    count = 0
+    last = None
+    more = False
+    try:
+        yield head
+        async for row in result:
+            if count == limit:
+                more = True
+                break
+            if count:
+                yield b","
+            yield dump_row(row)
+            last = row
+            count += 1
+    finally:
+        await result.close()
+        await session.close()
+    yield tail(last if more else None)